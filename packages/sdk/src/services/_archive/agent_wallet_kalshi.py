@@ -6,31 +6,68 @@ Reference: arXiv:2501.10114 "Infrastructure for AI Agents"
 """
 
 import os
+import ast
 import json
+import queue
+import atexit
+import logging
+import threading
 import time
 import uuid
+import bisect
 import hashlib
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List, Callable
-from dataclasses import dataclass, field, asdict
-from enum import Enum
+import heapq
+import itertools
+import mmap
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Callable, Tuple, Deque, Union
+from dataclasses import dataclass, field
+from enum import Enum, IntEnum
 from functools import wraps
+from logging.handlers import QueueListener, RotatingFileHandler
 
 from kalshi_client import KalshiClient
 
+try:
+    import orjson
+except ImportError:  # optional, stdlib json is used otherwise
+    orjson = None
+
+try:
+    from numba import njit
+except ImportError:  # optional, fused rule predicates run as plain Python otherwise
+    njit = None
+
+logger = logging.getLogger(__name__)
+
 
 # ─────────────────────────────────────────────────────────────────
 # Enums & Data Classes
 # ─────────────────────────────────────────────────────────────────
 
-class ActionType(Enum):
-    GET_BALANCE = "get_balance"
-    GET_POSITIONS = "get_positions"
-    GET_MARKETS = "get_markets"
-    GET_ORDERBOOK = "get_orderbook"
-    CREATE_ORDER = "create_order"
-    CANCEL_ORDER = "cancel_order"
-    BATCH_CANCEL = "batch_cancel"
+class ActionType(IntEnum):
+    # Integer values keep dispatch checks cheap; the lowercase name
+    # ("create_order") is what gets serialized, see ACTION_TYPE_NAMES
+    GET_BALANCE = 1
+    GET_POSITIONS = 2
+    GET_MARKETS = 3
+    GET_ORDERBOOK = 4
+    CREATE_ORDER = 5
+    CANCEL_ORDER = 6
+    BATCH_CANCEL = 7
+
+
+ACTION_TYPE_NAMES = {action_type: action_type.name.lower() for action_type in ActionType}
+
+
+# Actions that change account state and get the full REQUESTED/ALLOWED/EXECUTED
+# audit trail; read-only actions log just EXECUTED (or DENIED/FAILED)
+MUTATING_ACTIONS = frozenset({
+    ActionType.CREATE_ORDER,
+    ActionType.CANCEL_ORDER,
+    ActionType.BATCH_CANCEL,
+})
 
 
 class RuleResult(Enum):
@@ -50,7 +87,7 @@ class AuditEventType(Enum):
     KILL_SWITCH_DEACTIVATED = "kill_switch_deactivated"
 
 
-@dataclass
+@dataclass(slots=True)  # not frozen: is_active is toggled in place
 class Agent:
     """An AI agent with wallet access."""
     agent_id: str
@@ -61,15 +98,44 @@ class Agent:
     is_active: bool = True
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class SpendLimit:
     """Spend limit configuration."""
     max_per_order: int  # cents
     max_per_day: int  # cents
     max_per_week: int  # cents
     max_position_size: int  # contracts
-    allowed_tickers: Optional[List[str]] = None  # None = all allowed
-    blocked_tickers: List[str] = field(default_factory=list)
+    allowed_tickers: Optional[frozenset[str]] = None  # None = all allowed
+    blocked_tickers: frozenset[str] = field(default_factory=frozenset)
+    
+    def __post_init__(self):
+        # Accept any iterable (usually a list) and store frozensets for O(1) lookups
+        allowed = frozenset(self.allowed_tickers) if self.allowed_tickers else None
+        object.__setattr__(self, "allowed_tickers", allowed)
+        object.__setattr__(self, "blocked_tickers", frozenset(self.blocked_tickers))
+
+
+@dataclass(slots=True)
+class EvalContext:
+    """
+    Context handed to rule conditions.
+    Built once per action; the clock is sampled once so every rule sees the same time.
+    """
+    action_type: ActionType
+    request_data: Dict[str, Any]
+    agent: Agent
+    spend_limit: SpendLimit
+    daily_spend: int = 0
+    weekly_spend: int = 0
+    ticker: str = ""
+    order_value: int = 0
+    count: int = 0
+    hour: int = 0
+    weekday: int = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dict-style access for conditions written against the old context dict."""
+        return getattr(self, key, default)
 
 
 @dataclass
@@ -78,17 +144,100 @@ class Rule:
     rule_id: str
     name: str
     description: str
-    condition: Callable[[Dict[str, Any]], bool]
+    condition: Callable[[EvalContext], bool]
     action: RuleResult
     priority: int = 0  # Higher = evaluated first
     is_active: bool = True
+    condition_type: Optional[str] = None  # None = always evaluated
+    applies_to: Optional[frozenset[ActionType]] = None  # None = inferred from condition_type
+    condition_src: Optional[str] = None  # numeric expression equivalent to condition, see compile_condition
+    # Set by RulesEngine.add_rule: order of first insertion, the tie-break
+    # between rules of equal priority
+    seq: int = field(default=0, init=False, repr=False, compare=False)
 
 
-@dataclass
+# Numeric EvalContext fields a condition_src expression may use, in the
+# argument order of the fused predicate RulesEngine builds
+NUMERIC_FIELDS = ("daily_spend", "weekly_spend", "order_value", "count", "hour", "weekday")
+
+_CONDITION_SRC_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Name, ast.Load, ast.Constant,
+)
+
+
+def _validate_condition_src(src: str) -> None:
+    """Allow only arithmetic/comparisons over NUMERIC_FIELDS and number literals."""
+    try:
+        tree = ast.parse(src, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid rule condition {src!r}: {e.msg}")
+    for node in ast.walk(tree):
+        if not isinstance(node, _CONDITION_SRC_NODES):
+            raise ValueError(f"Unsupported syntax in rule condition {src!r}: {type(node).__name__}")
+        if isinstance(node, ast.Name) and node.id not in NUMERIC_FIELDS:
+            raise ValueError(f"Unknown field in rule condition {src!r}: {node.id}")
+        if isinstance(node, ast.Constant) and type(node.value) not in (int, float, bool):
+            raise ValueError(f"Only numbers are allowed in rule condition {src!r}")
+
+
+def _exec_function(source: str, name: str) -> Callable:
+    namespace: Dict[str, Any] = {"__builtins__": {}}
+    exec(source, namespace)
+    return namespace[name]
+
+
+def compile_condition(src: str) -> Callable[[EvalContext], bool]:
+    """
+    Build a rule condition from a numeric expression such as
+    "order_value > 10000". Pass the same string as Rule.condition_src so the
+    engine can fuse it with other such rules.
+    """
+    _validate_condition_src(src)
+    # Read only the fields the expression uses
+    used = {node.id for node in ast.walk(ast.parse(src, mode="eval")) if isinstance(node, ast.Name)}
+    loads = "".join(f"    {name} = ctx.{name}\n" for name in NUMERIC_FIELDS if name in used)
+    # Conditional expression rather than bool(): the function runs without builtins
+    return _exec_function(f"def condition(ctx):\n{loads}    return True if ({src}) else False\n", "condition")
+
+
+def _fuse_conditions(sources: List[Tuple[int, str]], miss: int) -> Callable[..., int]:
+    """
+    One predicate for a list of (position, condition_src) in priority order:
+    takes NUMERIC_FIELDS positionally and returns the position of the first
+    expression that holds, or `miss`. JIT-compiled when numba is installed.
+    """
+    lines = [f"def fused({', '.join(NUMERIC_FIELDS)}):"]
+    for position, src in sources:
+        lines.append(f"    if {src}:")
+        lines.append(f"        return {position}")
+    lines.append(f"    return {miss}")
+    fused = _exec_function("\n".join(lines) + "\n", "fused")
+    return njit(fused) if njit is not None else fused
+
+
+# Condition types that only read order fields (order_value, ticker, count),
+# so they can never trigger on non-order actions.
+ORDER_CONDITION_TYPES = frozenset({"max_order_value", "ticker_block", "position_size"})
+
+
+def _rule_applies(rule: Rule, action_type: ActionType) -> bool:
+    if rule.applies_to is not None:
+        return action_type in rule.applies_to
+    return action_type == ActionType.CREATE_ORDER or rule.condition_type not in ORDER_CONDITION_TYPES
+
+
+def _rule_sort_key(rule: Rule) -> Tuple[int, int]:
+    # Highest priority first; equal priorities in the order they were added
+    return -rule.priority, rule.seq
+
+
+@dataclass(frozen=True, slots=True)
 class AuditEvent:
     """An audit log entry."""
     event_id: str
-    timestamp: str
+    timestamp: int  # ns since epoch, see timestamp_iso
     agent_id: str
     event_type: AuditEventType
     action_type: Optional[ActionType]
@@ -97,29 +246,144 @@ class AuditEvent:
     rule_id: Optional[str] = None
     error: Optional[str] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
+    
+    @property
+    def timestamp_iso(self) -> str:
+        """Timestamp as a naive UTC ISO 8601 string."""
+        return _ns_to_iso(self.timestamp)
+
+
+def _ns_to_iso(ts_ns: int) -> str:
+    return datetime.fromtimestamp(ts_ns / 1e9, timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def _to_epoch(dt: datetime) -> float:
+    """Epoch seconds for a datetime; naive values are taken as UTC."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
 
 
 # ─────────────────────────────────────────────────────────────────
 # Audit Logger
 # ─────────────────────────────────────────────────────────────────
 
+def _event_to_dict(event: AuditEvent) -> Dict[str, Any]:
+    """Plain-dict form of an event, as returned by the API and written to the log."""
+    return {
+        "event_id": event.event_id,
+        "timestamp": event.timestamp_iso,
+        "agent_id": event.agent_id,
+        "event_type": event.event_type.value,
+        "action_type": ACTION_TYPE_NAMES[event.action_type] if event.action_type is not None else None,
+        "request_data": event.request_data,
+        "response_data": event.response_data,
+        "rule_id": event.rule_id,
+        "error": event.error,
+        "metadata": event.metadata,
+    }
+
+
+# Converters for values the serializer doesn't handle natively, by exact type
+# (orjson already covers datetime, UUID and Enum itself)
+_JSON_CONVERTERS: Dict[type, Callable[[Any], Any]] = {
+    set: sorted,
+    frozenset: sorted,
+    datetime: datetime.isoformat,
+    uuid.UUID: str,
+}
+
+
+def _json_default(obj: Any) -> Any:
+    converter = _JSON_CONVERTERS.get(type(obj))
+    if converter is not None:
+        return converter(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    return str(obj)
+
+
+# Serializer is chosen once at import: orjson when installed, else stdlib json
+if orjson is not None:
+    def _dumps(data: Dict[str, Any]) -> str:
+        return orjson.dumps(data, default=_json_default, option=orjson.OPT_NON_STR_KEYS).decode()
+    
+    _loads = orjson.loads
+else:
+    def _dumps(data: Dict[str, Any]) -> str:
+        return json.dumps(data, default=_json_default, separators=(",", ":"))
+    
+    _loads = json.loads
+
+
 class AuditLogger:
     """
     Immutable audit log for all agent actions.
     In production, this would write to a database or append-only log.
     """
     
-    def __init__(self, log_file: Optional[str] = None):
+    MAX_EVENTS = 100_000  # per index; older events remain in the log file
+    
+    def __init__(
+        self,
+        log_file: Optional[str] = None,
+        max_bytes: int = 100_000_000,
+        backup_count: int = 10,
+    ):
         self.log_file = log_file or "agent_wallet_audit.jsonl"
-        self.events: List[AuditEvent] = []
+        # Each event is kept with its dict form, built once when logged, in a
+        # global deque plus per-agent and per-type indices (all oldest first)
+        self.records: Deque[Tuple[AuditEvent, Dict[str, Any]]] = deque(maxlen=self.MAX_EVENTS)
+        self._by_agent: Dict[str, Deque[Tuple[AuditEvent, Dict[str, Any]]]] = defaultdict(
+            lambda: deque(maxlen=self.MAX_EVENTS)
+        )
+        self._by_type: Dict[AuditEventType, Deque[Tuple[AuditEvent, Dict[str, Any]]]] = defaultdict(
+            lambda: deque(maxlen=self.MAX_EVENTS)
+        )
+        self._lock = threading.Lock()
+        
+        # File appends happen on a QueueListener thread so actions never wait on
+        # disk; log() only enqueues. The file rotates at max_bytes. Records go
+        # straight onto the queue rather than through a named Logger, which the
+        # logging module would keep alive after this instance is gone.
+        self._queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+        self._file_handler = RotatingFileHandler(
+            self.log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8",
+        )
+        self._listener = QueueListener(self._queue, self._file_handler)
+        self._listener.start()
+        self._closed = False
+        atexit.register(self.close)
+    
+    @property
+    def events(self) -> List[AuditEvent]:
+        with self._lock:
+            return [event for event, _ in self.records]
     
     def log(self, event: AuditEvent) -> None:
         """Log an audit event."""
-        self.events.append(event)
+        event_dict = _event_to_dict(event)
+        record = (event, event_dict)
+        with self._lock:
+            self.records.append(record)
+            self._by_agent[event.agent_id].append(record)
+            self._by_type[event.event_type].append(record)
         
         # Append to file (append-only for immutability)
-        with open(self.log_file, "a") as f:
-            f.write(json.dumps(asdict(event), default=str) + "\n")
+        self._queue.put_nowait(logging.makeLogRecord({
+            "msg": _dumps(event_dict),
+            "levelno": logging.INFO,
+            "levelname": "INFO",
+        }))
+    
+    def close(self) -> None:
+        """Flush queued events to the log file and stop the writer."""
+        if self._closed:
+            return
+        self._closed = True
+        self._listener.stop()
+        self._file_handler.close()
+        atexit.unregister(self.close)
     
     def create_event(
         self,
@@ -135,7 +399,7 @@ class AuditLogger:
         """Create and log an audit event."""
         event = AuditEvent(
             event_id=str(uuid.uuid4()),
-            timestamp=datetime.utcnow().isoformat(),
+            timestamp=time.time_ns(),
             agent_id=agent_id,
             event_type=event_type,
             action_type=action_type,
@@ -148,6 +412,43 @@ class AuditLogger:
         self.log(event)
         return event
     
+    def _query(
+        self,
+        agent_id: Optional[str] = None,
+        event_type: Optional[AuditEventType] = None,
+        since: Optional[datetime] = None,
+        limit: int = 100,
+    ) -> List[Tuple[AuditEvent, Dict[str, Any]]]:
+        """
+        Walk the narrowest index newest-first and stop after `limit` matches,
+        or at the first event older than `since` (indices are in log order).
+        """
+        matched: List[Tuple[AuditEvent, Dict[str, Any]]] = []
+        if limit <= 0:
+            return matched
+        since_ns = int(_to_epoch(since) * 1e9) if since else None
+        
+        with self._lock:
+            if agent_id:
+                index = self._by_agent.get(agent_id, ())
+            elif event_type:
+                index = self._by_type.get(event_type, ())
+            else:
+                index = self.records
+            
+            for record in reversed(index):
+                event = record[0]
+                if since_ns is not None and event.timestamp < since_ns:
+                    break
+                if agent_id and event_type and event.event_type != event_type:
+                    continue
+                matched.append(record)
+                if len(matched) == limit:
+                    break
+        
+        matched.reverse()
+        return matched
+    
     def get_events(
         self,
         agent_id: Optional[str] = None,
@@ -156,22 +457,79 @@ class AuditLogger:
         limit: int = 100,
     ) -> List[AuditEvent]:
         """Query audit events."""
-        filtered = self.events
+        return [event for event, _ in self._query(agent_id, event_type, since, limit)]
+    
+    def get_event_dicts(
+        self,
+        agent_id: Optional[str] = None,
+        event_type: Optional[AuditEventType] = None,
+        since: Optional[datetime] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """Query audit events, returning the dicts built when they were logged."""
+        return [event_dict for _, event_dict in self._query(agent_id, event_type, since, limit)]
+    
+    def read_log_tail(
+        self,
+        limit: int = 100,
+        agent_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Read the most recent events from the log file, oldest first.
+        Walks the file backwards through mmap and parses only the lines it
+        returns, so memory stays O(limit) however large the log grows.
+        Events still queued for the writer thread, and rotated backups, are not included.
+        """
+        try:
+            f = open(self.log_file, "rb")
+        except FileNotFoundError:
+            return []
         
-        if agent_id:
-            filtered = [e for e in filtered if e.agent_id == agent_id]
-        if event_type:
-            filtered = [e for e in filtered if e.event_type == event_type]
-        if since:
-            filtered = [e for e in filtered if datetime.fromisoformat(e.timestamp) >= since]
+        events: List[Dict[str, Any]] = []
+        needle = agent_id.encode() if agent_id else None
+        with f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                end = mm.size()
+                while end > 0 and len(events) < limit:
+                    start = mm.rfind(b"\n", 0, end)
+                    line = mm[start + 1:end]
+                    end = max(start, 0)
+                    
+                    if not line.strip() or (needle and needle not in line):
+                        continue
+                    try:
+                        event = _loads(line)
+                    except ValueError:
+                        continue  # partially written line
+                    if agent_id and event.get("agent_id") != agent_id:
+                        continue
+                    events.append(event)
         
-        return filtered[-limit:]
+        events.reverse()
+        return events
 
 
 # ─────────────────────────────────────────────────────────────────
 # Rules Engine
 # ─────────────────────────────────────────────────────────────────
 
+def _serializable_view(context: EvalContext) -> Dict[str, Any]:
+    """
+    The scalar fields of an EvalContext for audit logging; the Agent and
+    SpendLimit objects it references are left out.
+    """
+    return {
+        "action_type": ACTION_TYPE_NAMES[context.action_type],
+        "ticker": context.ticker,
+        "order_value": context.order_value,
+        "count": context.count,
+        "daily_spend": context.daily_spend,
+        "weekly_spend": context.weekly_spend,
+    }
+
+
 class RulesEngine:
     """
     Evaluates rules to determine if an action should be allowed.
@@ -180,18 +538,79 @@ class RulesEngine:
     
     def __init__(self):
         self.rules: Dict[str, Rule] = {}
+        # condition_type -> rules, each bucket kept sorted by priority (highest first)
+        self.rules_by_type: Dict[Optional[str], List[Rule]] = {}
+        # action type -> (active rules that apply to it in evaluation order,
+        # fused predicate over the condition_src rules in that list), rebuilt
+        # lazily when dirty. Each pair is swapped as one value so a concurrent
+        # evaluate() never matches a rule list with another list's predicate.
+        self._compiled: Dict[ActionType, Tuple[List[Rule], Optional[Callable[..., int]]]] = {
+            a: ([], None) for a in ActionType
+        }
+        self._dirty = False
+        self._next_seq = itertools.count()
     
     def add_rule(self, rule: Rule) -> None:
-        """Add a rule to the engine."""
+        """Add a rule to the engine. Replacing a rule_id keeps its place among equal priorities."""
+        if rule.condition_src is not None:
+            _validate_condition_src(rule.condition_src)
+        existing = self.rules.get(rule.rule_id)
+        rule.seq = existing.seq if existing is not None else next(self._next_seq)
+        self.remove_rule(rule.rule_id)
         self.rules[rule.rule_id] = rule
+        bucket = self.rules_by_type.setdefault(rule.condition_type, [])
+        bisect.insort(bucket, rule, key=_rule_sort_key)
+        self._dirty = True
     
     def remove_rule(self, rule_id: str) -> None:
         """Remove a rule."""
-        self.rules.pop(rule_id, None)
+        rule = self.rules.pop(rule_id, None)
+        if rule is not None:
+            self.rules_by_type[rule.condition_type].remove(rule)
+            self._dirty = True
+    
+    def mark_dirty(self) -> None:
+        """Call after changing a rule's is_active or priority in place."""
+        self._dirty = True
+    
+    def _rebuild(self) -> None:
+        # Clear the flag first so a rule added mid-rebuild triggers another one
+        self._dirty = False
+        buckets = [sorted(bucket, key=_rule_sort_key) for bucket in list(self.rules_by_type.values())]
+        ordered = [rule for rule in heapq.merge(*buckets, key=_rule_sort_key) if rule.is_active]
+        sorted_active = {
+            action_type: [rule for rule in ordered if _rule_applies(rule, action_type)]
+            for action_type in ActionType
+        }
+        
+        # Action types often share the same rule list; compile each one once
+        compiled: Dict[Tuple[Tuple[Tuple[int, str], ...], int], Callable[..., int]] = {}
+        by_action: Dict[ActionType, Tuple[List[Rule], Optional[Callable[..., int]]]] = {}
+        for action_type, rules in sorted_active.items():
+            sources = tuple(
+                (position, rule.condition_src)
+                for position, rule in enumerate(rules)
+                if rule.condition_src is not None
+            )
+            if not sources:
+                by_action[action_type] = (rules, None)
+                continue
+            key = (sources, len(rules))
+            if key not in compiled:
+                compiled[key] = _fuse_conditions(list(sources), miss=len(rules))
+            by_action[action_type] = (rules, compiled[key])
+        
+        self._compiled = by_action
+    
+    def has_rules_for(self, action_type: ActionType) -> bool:
+        """Whether any active rule could trigger on this action type."""
+        if self._dirty:
+            self._rebuild()
+        return bool(self._compiled[action_type][0])
     
     def evaluate(
         self,
-        context: Dict[str, Any],
+        context: EvalContext,
         audit_logger: Optional[AuditLogger] = None,
         agent_id: Optional[str] = None,
     ) -> tuple[RuleResult, Optional[str]]:
@@ -199,75 +618,215 @@ class RulesEngine:
         Evaluate all rules against the context.
         Returns (result, triggered_rule_id).
         """
-        # Sort by priority (highest first)
-        sorted_rules = sorted(
-            [r for r in self.rules.values() if r.is_active],
-            key=lambda r: r.priority,
-            reverse=True,
-        )
+        if self._dirty:
+            self._rebuild()
+        
+        compiled = self._compiled
+        entry = compiled[context.action_type]
+        rules, fused = entry
+        
+        # Rules with condition_src are checked in one call to the fused
+        # predicate, which gives the position of the first one that holds;
+        # only plain-Python rules ahead of it still need to run
+        hit = len(rules)
+        if fused is not None:
+            try:
+                hit = fused(
+                    context.daily_spend, context.weekly_spend, context.order_value,
+                    context.count, context.hour, context.weekday,
+                )
+            except Exception:
+                logger.exception("Fused rule evaluation failed, using per-rule conditions")
+                fused = None
+                # Drop the predicate for this rule list so it isn't retried
+                # (or recompiled) on every call; a rebuild since we read the
+                # entry has already replaced it
+                if compiled.get(context.action_type) is entry:
+                    compiled[context.action_type] = (rules, None)
         
-        for rule in sorted_rules:
+        for position in range(hit):
+            rule = rules[position]
+            if fused is not None and rule.condition_src is not None:
+                continue
             try:
                 if rule.condition(context):
-                    if audit_logger and agent_id:
-                        audit_logger.create_event(
-                            agent_id=agent_id,
-                            event_type=AuditEventType.RULE_TRIGGERED,
-                            action_type=context.get("action_type"),
-                            request_data=context,
-                            rule_id=rule.rule_id,
-                            metadata={"rule_name": rule.name, "result": rule.action.value},
-                        )
-                    return rule.action, rule.rule_id
-            except Exception as e:
+                    return self._trigger(rule, context, audit_logger, agent_id)
+            except Exception:
                 # Rule evaluation failed - log but continue
-                print(f"Rule {rule.rule_id} evaluation failed: {e}")
+                logger.exception("Rule %s evaluation failed", rule.rule_id)
                 continue
         
+        if hit < len(rules):
+            return self._trigger(rules[hit], context, audit_logger, agent_id)
+        
         # No rules triggered - default allow
         return RuleResult.ALLOW, None
+    
+    def _trigger(
+        self,
+        rule: Rule,
+        context: EvalContext,
+        audit_logger: Optional[AuditLogger],
+        agent_id: Optional[str],
+    ) -> tuple[RuleResult, Optional[str]]:
+        if audit_logger and agent_id:
+            audit_logger.create_event(
+                agent_id=agent_id,
+                event_type=AuditEventType.RULE_TRIGGERED,
+                action_type=context.action_type,
+                request_data=_serializable_view(context),
+                rule_id=rule.rule_id,
+                metadata={"rule_name": rule.name, "result": rule.action.value},
+            )
+        return rule.action, rule.rule_id
 
 
 # ─────────────────────────────────────────────────────────────────
 # Spend Tracker
 # ─────────────────────────────────────────────────────────────────
 
+DAY_SECONDS = 24 * 60 * 60
+WEEK_SECONDS = 7 * DAY_SECONDS
+
+
+class _SpendWindow:
+    """Rolling 24h and 7d spend totals for one agent, kept as running sums."""
+    
+    __slots__ = ("daily", "weekly", "daily_total", "weekly_total")
+    
+    def __init__(self):
+        # (epoch_seconds, amount_cents), oldest first
+        self.daily: Deque[Tuple[float, int]] = deque()
+        self.weekly: Deque[Tuple[float, int]] = deque()
+        self.daily_total = 0
+        self.weekly_total = 0
+    
+    def expire(self, now: float) -> None:
+        """Drop entries that have aged out of each window."""
+        daily, weekly = self.daily, self.weekly
+        while daily and now - daily[0][0] > DAY_SECONDS:
+            self.daily_total -= daily.popleft()[1]
+        while weekly and now - weekly[0][0] > WEEK_SECONDS:
+            self.weekly_total -= weekly.popleft()[1]
+
+
 class SpendTracker:
-    """Tracks agent spending for limit enforcement."""
+    """
+    Tracks agent spending for limit enforcement.
+    Only the last 7 days of transactions are kept.
+    """
     
     def __init__(self):
-        # agent_id -> list of (timestamp, amount_cents)
-        self.transactions: Dict[str, List[tuple[datetime, int]]] = {}
+        # Reads use .get() so querying an unknown agent doesn't create a window
+        self.windows: Dict[str, _SpendWindow] = defaultdict(_SpendWindow)
+        self._lock = threading.Lock()
     
     def record_spend(self, agent_id: str, amount_cents: int) -> None:
         """Record a spend transaction."""
-        if agent_id not in self.transactions:
-            self.transactions[agent_id] = []
-        self.transactions[agent_id].append((datetime.utcnow(), amount_cents))
+        now = time.time()
+        entry = (now, amount_cents)
+        with self._lock:
+            window = self.windows[agent_id]
+            window.expire(now)
+            window.daily.append(entry)
+            window.weekly.append(entry)
+            window.daily_total += amount_cents
+            window.weekly_total += amount_cents
     
-    def get_spend(self, agent_id: str, since: datetime) -> int:
-        """Get total spend since a given time."""
-        if agent_id not in self.transactions:
+    def get_spend(self, agent_id: str, since: Union[float, datetime]) -> int:
+        """
+        Get total spend since a given time (at most 7 days back).
+        `since` is epoch seconds, or a datetime (naive = UTC).
+        """
+        window = self.windows.get(agent_id)
+        if window is None:
             return 0
         
-        return sum(
-            amount for ts, amount in self.transactions[agent_id]
-            if ts >= since
-        )
+        since_ts = _to_epoch(since) if isinstance(since, datetime) else since
+        with self._lock:
+            return sum(amount for ts, amount in window.weekly if ts >= since_ts)
     
     def get_daily_spend(self, agent_id: str) -> int:
         """Get spend in the last 24 hours."""
-        return self.get_spend(agent_id, datetime.utcnow() - timedelta(days=1))
+        window = self.windows.get(agent_id)
+        if window is None:
+            return 0
+        with self._lock:
+            window.expire(time.time())
+            return window.daily_total
     
     def get_weekly_spend(self, agent_id: str) -> int:
         """Get spend in the last 7 days."""
-        return self.get_spend(agent_id, datetime.utcnow() - timedelta(days=7))
+        window = self.windows.get(agent_id)
+        if window is None:
+            return 0
+        with self._lock:
+            window.expire(time.time())
+            return window.weekly_total
 
 
 # ─────────────────────────────────────────────────────────────────
 # Agent Wallet
 # ─────────────────────────────────────────────────────────────────
 
+def _cancel_all_for_kill_switch(client: KalshiClient) -> Dict[str, Any]:
+    try:
+        result = client.batch_cancel_orders()
+        return {"status": "kill_switch_activated", "orders_cancelled": result}
+    except Exception as e:
+        return {"status": "kill_switch_activated", "cancel_error": str(e)}
+
+
+OrderChecker = Callable[[int, int, int, int, str], Optional[str]]
+
+
+def _compile_order_checker(spend_limit: SpendLimit) -> OrderChecker:
+    """
+    Build an order check specialized to one SpendLimit: the limits are bound
+    as locals once, and checks for an unset allow-list are left out entirely.
+    The returned function takes (order_value, count, daily_spend, weekly_spend,
+    ticker) and returns a denial reason, or None if the order is within limits.
+    """
+    max_per_order = spend_limit.max_per_order
+    max_per_day = spend_limit.max_per_day
+    max_per_week = spend_limit.max_per_week
+    max_position_size = spend_limit.max_position_size
+    allowed = spend_limit.allowed_tickers
+    blocked = spend_limit.blocked_tickers
+    
+    def check_limits(order_value: int, count: int, daily_spend: int, weekly_spend: int) -> Optional[str]:
+        if order_value > max_per_order:
+            return f"Order value {order_value} exceeds max_per_order {max_per_order}"
+        if daily_spend + order_value > max_per_day:
+            return f"Would exceed daily spend limit of {max_per_day}"
+        if weekly_spend + order_value > max_per_week:
+            return f"Would exceed weekly spend limit of {max_per_week}"
+        if count > max_position_size:
+            return f"Position size {count} exceeds max {max_position_size}"
+        return None
+    
+    if allowed:
+        def check(order_value: int, count: int, daily_spend: int, weekly_spend: int, ticker: str) -> Optional[str]:
+            reason = check_limits(order_value, count, daily_spend, weekly_spend)
+            if reason is not None:
+                return reason
+            if ticker not in allowed:
+                return f"Ticker {ticker} not in allowed list"
+            if ticker in blocked:
+                return f"Ticker {ticker} is blocked"
+            return None
+    else:
+        def check(order_value: int, count: int, daily_spend: int, weekly_spend: int, ticker: str) -> Optional[str]:
+            reason = check_limits(order_value, count, daily_spend, weekly_spend)
+            if reason is not None:
+                return reason
+            if ticker in blocked:
+                return f"Ticker {ticker} is blocked"
+            return None
+    
+    return check
+
+
 class AgentWallet:
     """
     A wallet for an AI agent with spend controls and rules.
@@ -290,6 +849,8 @@ class AgentWallet:
         self.audit_logger = audit_logger
         self.spend_tracker = spend_tracker
         self._kill_switch_active = False
+        # Rebuild with _compile_order_checker if spend_limit is replaced
+        self._check_order = _compile_order_checker(spend_limit)
     
     # ─────────────────────────────────────────────────────────────
     # Kill Switch
@@ -299,21 +860,20 @@ class AgentWallet:
         """
         Activate kill switch - cancels all orders and blocks new actions.
         """
-        self._kill_switch_active = True
+        self._engage_kill_switch(reason)
         
+        # Cancel all resting orders
+        return _cancel_all_for_kill_switch(self.client)
+    
+    def _engage_kill_switch(self, reason: str) -> None:
+        """Block new actions and audit it, without touching the exchange."""
+        self._kill_switch_active = True
         self.audit_logger.create_event(
             agent_id=self.agent.agent_id,
             event_type=AuditEventType.KILL_SWITCH_ACTIVATED,
             action_type=None,
             request_data={"reason": reason},
         )
-        
-        # Cancel all resting orders
-        try:
-            result = self.client.batch_cancel_orders()
-            return {"status": "kill_switch_activated", "orders_cancelled": result}
-        except Exception as e:
-            return {"status": "kill_switch_activated", "cancel_error": str(e)}
     
     def deactivate_kill_switch(self) -> None:
         """Deactivate kill switch."""
@@ -351,15 +911,23 @@ class AgentWallet:
         if not self.agent.is_active:
             return False, "Agent is deactivated"
         
+        # Reads have no spend limits, so with no rules to run there is nothing
+        # else to check
+        if action_type not in MUTATING_ACTIONS and not self.rules_engine.has_rules_for(action_type):
+            return True, None
+        
         # Build context for rules engine
-        context = {
-            "action_type": action_type,
-            "request_data": request_data,
-            "agent": self.agent,
-            "spend_limit": self.spend_limit,
-            "daily_spend": self.spend_tracker.get_daily_spend(self.agent.agent_id),
-            "weekly_spend": self.spend_tracker.get_weekly_spend(self.agent.agent_id),
-        }
+        now = time.gmtime()
+        context = EvalContext(
+            action_type=action_type,
+            request_data=request_data,
+            agent=self.agent,
+            spend_limit=self.spend_limit,
+            daily_spend=self.spend_tracker.get_daily_spend(self.agent.agent_id),
+            weekly_spend=self.spend_tracker.get_weekly_spend(self.agent.agent_id),
+            hour=now.tm_hour,
+            weekday=now.tm_wday,  # Monday = 0, same as datetime.weekday()
+        )
         
         # For orders, add additional context
         if action_type == ActionType.CREATE_ORDER:
@@ -368,31 +936,16 @@ class AgentWallet:
             count = request_data.get("count", 0)
             order_value = price * count
             
-            context.update({
-                "ticker": ticker,
-                "order_value": order_value,
-                "count": count,
-            })
-            
-            # Spend limit checks
-            if order_value > self.spend_limit.max_per_order:
-                return False, f"Order value {order_value} exceeds max_per_order {self.spend_limit.max_per_order}"
-            
-            if context["daily_spend"] + order_value > self.spend_limit.max_per_day:
-                return False, f"Would exceed daily spend limit of {self.spend_limit.max_per_day}"
+            context.ticker = ticker
+            context.order_value = order_value
+            context.count = count
             
-            if context["weekly_spend"] + order_value > self.spend_limit.max_per_week:
-                return False, f"Would exceed weekly spend limit of {self.spend_limit.max_per_week}"
-            
-            if count > self.spend_limit.max_position_size:
-                return False, f"Position size {count} exceeds max {self.spend_limit.max_position_size}"
-            
-            # Ticker restrictions
-            if self.spend_limit.allowed_tickers and ticker not in self.spend_limit.allowed_tickers:
-                return False, f"Ticker {ticker} not in allowed list"
-            
-            if ticker in self.spend_limit.blocked_tickers:
-                return False, f"Ticker {ticker} is blocked"
+            # Spend limit and ticker restriction checks
+            denial_reason = self._check_order(
+                order_value, count, context.daily_spend, context.weekly_spend, ticker,
+            )
+            if denial_reason is not None:
+                return False, denial_reason
         
         # Rules engine evaluation
         rule_result, rule_id = self.rules_engine.evaluate(
@@ -416,14 +969,16 @@ class AgentWallet:
         action_fn: Callable[[], Dict[str, Any]],
     ) -> Dict[str, Any]:
         """Execute an action with full audit trail."""
+        mutating = action_type in MUTATING_ACTIONS
         
         # Log request
-        self.audit_logger.create_event(
-            agent_id=self.agent.agent_id,
-            event_type=AuditEventType.ACTION_REQUESTED,
-            action_type=action_type,
-            request_data=request_data,
-        )
+        if mutating:
+            self.audit_logger.create_event(
+                agent_id=self.agent.agent_id,
+                event_type=AuditEventType.ACTION_REQUESTED,
+                action_type=action_type,
+                request_data=request_data,
+            )
         
         # Check controls
         allowed, denial_reason = self._check_controls(action_type, request_data)
@@ -439,12 +994,13 @@ class AgentWallet:
             raise PermissionError(denial_reason)
         
         # Log allowed
-        self.audit_logger.create_event(
-            agent_id=self.agent.agent_id,
-            event_type=AuditEventType.ACTION_ALLOWED,
-            action_type=action_type,
-            request_data=request_data,
-        )
+        if mutating:
+            self.audit_logger.create_event(
+                agent_id=self.agent.agent_id,
+                event_type=AuditEventType.ACTION_ALLOWED,
+                action_type=action_type,
+                request_data=request_data,
+            )
         
         # Execute
         try:
@@ -624,9 +1180,11 @@ class AgentWalletManager:
             rule_id="default_max_order_value",
             name="Maximum Order Value",
             description="Block orders over $100",
-            condition=lambda ctx: ctx.get("order_value", 0) > 10000,  # 100 dollars in cents
+            condition=compile_condition("order_value > 10000"),  # 100 dollars in cents
             action=RuleResult.DENY,
             priority=100,
+            condition_type="max_order_value",
+            condition_src="order_value > 10000",
         ))
         
         # Require approval for orders over $50
@@ -634,9 +1192,11 @@ class AgentWalletManager:
             rule_id="default_approval_threshold",
             name="Approval Threshold",
             description="Require approval for orders over $50",
-            condition=lambda ctx: ctx.get("order_value", 0) > 5000,
+            condition=compile_condition("order_value > 5000"),
             action=RuleResult.REQUIRE_APPROVAL,
             priority=50,
+            condition_type="max_order_value",
+            condition_src="order_value > 5000",
         ))
     
     def create_agent(
@@ -694,10 +1254,18 @@ class AgentWalletManager:
     
     def global_kill_switch(self, reason: str = "") -> Dict[str, Any]:
         """Activate kill switch for ALL agents."""
-        results = {}
-        for agent_id, wallet in self.wallets.items():
-            results[agent_id] = wallet.activate_kill_switch(reason)
-        return results
+        wallets = list(self.wallets.items())
+        if not wallets:
+            return {}
+        
+        # Block (and audit) every wallet first, then run one batch cancel:
+        # every wallet trades through the same client. Audit writes only
+        # enqueue, so engaging all wallets up front costs little.
+        for _, wallet in wallets:
+            wallet._engage_kill_switch(reason)
+        cancel_result = _cancel_all_for_kill_switch(self.kalshi_client)
+        
+        return {agent_id: cancel_result for agent_id, _ in wallets}
     
     def add_rule(self, rule: Rule) -> None:
         """Add a global rule."""
@@ -707,10 +1275,16 @@ class AgentWalletManager:
         self,
         agent_id: Optional[str] = None,
         limit: int = 100,
+        persisted: bool = False,
     ) -> List[Dict[str, Any]]:
-        """Get audit log entries."""
-        events = self.audit_logger.get_events(agent_id=agent_id, limit=limit)
-        return [asdict(e) for e in events]
+        """
+        Get audit log entries.
+        With persisted=True, read from the log file instead of memory
+        (includes events from earlier runs).
+        """
+        if persisted:
+            return self.audit_logger.read_log_tail(limit=limit, agent_id=agent_id)
+        return self.audit_logger.get_event_dicts(agent_id=agent_id, limit=limit)
 
 
 # ─────────────────────────────────────────────────────────────────
@@ -772,7 +1346,7 @@ if __name__ == "__main__":
         rule_id="no_weekend_trading",
         name="No Weekend Trading",
         description="Block trading on weekends",
-        condition=lambda ctx: datetime.utcnow().weekday() >= 5,
+        condition=lambda ctx: ctx.weekday >= 5,
         action=RuleResult.DENY,
         priority=200,
     ))
@@ -3,14 +3,174 @@ Kalshi API Client with RSA-PSS Authentication
 Works with api.elections.kalshi.com
 """
 
-import requests
-import datetime
-import base64
+import httpx
+import time
+import asyncio
+import threading
+import binascii
+import ctypes
+import ctypes.util
 import os
-from typing import Optional, Dict, Any, List
+from functools import lru_cache
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple, Set, Callable, Iterator, AsyncIterator
 from cryptography.hazmat.primitives import serialization, hashes
 from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.asymmetric import padding, rsa, ec
+
+try:
+    import orjson
+except ImportError:  # optional, stdlib json is used otherwise
+    orjson = None
+    import json as stdlib_json
+
+
+if orjson is not None:
+    _encode_body = orjson.dumps
+    _decode_body = orjson.loads
+else:
+    def _encode_body(data: Any) -> bytes:
+        return stdlib_json.dumps(data, separators=(",", ":")).encode("utf-8")
+    
+    _decode_body = stdlib_json.loads
+
+
+# Signature parameters are built once and shared by every sign() call
+_PSS_PADDING = padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.DIGEST_LENGTH)
+_SHA256 = hashes.SHA256()
+_ECDSA_SHA256 = ec.ECDSA(_SHA256)
+
+SIGNING_ALGORITHMS = ("rsa-pss", "ecdsa-p256")
+
+
+@lru_cache(maxsize=32)
+def _load_private_key(key_data: bytes):
+    """Parse a PEM private key; clients built from the same key share one object."""
+    return serialization.load_pem_private_key(key_data, password=None, backend=default_backend())
+
+
+@lru_cache(maxsize=8)
+def _expanded_path(path: str) -> str:
+    """~-expanded key path, cached per distinct setting."""
+    # Symlinks are deliberately not resolved (or cached): secret mounts
+    # rotate keys by repointing a link, and open() should follow the new one
+    return os.path.expanduser(path)
+
+
+@lru_cache(maxsize=1)
+def _libcrypto() -> Optional[ctypes.CDLL]:
+    """OpenSSL 3 libcrypto with EVP signing prototypes set, or None if unavailable."""
+    name = ctypes.util.find_library("crypto")
+    if name is None:
+        return None
+    try:
+        lib = ctypes.CDLL(name)
+        lib.EVP_PKEY_CTX_set_rsa_padding  # OpenSSL 3 exports these as functions
+    except (OSError, AttributeError):
+        return None
+    vp, sz = ctypes.c_void_p, ctypes.c_size_t
+    for fn, restype, argtypes in (
+        ("BIO_new_mem_buf", vp, [ctypes.c_char_p, ctypes.c_int]),
+        ("BIO_free", ctypes.c_int, [vp]),
+        ("PEM_read_bio_PrivateKey", vp, [vp, vp, vp, vp]),
+        ("EVP_PKEY_get_size", ctypes.c_int, [vp]),
+        ("EVP_PKEY_free", None, [vp]),
+        ("EVP_sha256", vp, []),
+        ("EVP_MD_CTX_new", vp, []),
+        ("EVP_MD_CTX_reset", ctypes.c_int, [vp]),
+        ("EVP_MD_CTX_free", None, [vp]),
+        ("EVP_DigestSignInit", ctypes.c_int, [vp, ctypes.POINTER(vp), vp, vp, vp]),
+        ("EVP_DigestSign", ctypes.c_int, [vp, ctypes.c_char_p, ctypes.POINTER(sz), ctypes.c_char_p, sz]),
+        ("EVP_PKEY_CTX_set_rsa_padding", ctypes.c_int, [vp, ctypes.c_int]),
+        ("EVP_PKEY_CTX_set_rsa_pss_saltlen", ctypes.c_int, [vp, ctypes.c_int]),
+        ("EVP_PKEY_CTX_set_rsa_mgf1_md", ctypes.c_int, [vp, vp]),
+    ):
+        func = getattr(lib, fn)
+        func.restype = restype
+        func.argtypes = argtypes
+    return lib
+
+
+class _OpenSSLSigner:
+    """
+    RSA-PSS/SHA-256 signing straight through libcrypto's EVP API, skipping
+    the cryptography wrapper layers. Opt-in via KALSHI_FAST_SIGN=1.
+    """
+    
+    RSA_PKCS1_PSS_PADDING = 6
+    RSA_PSS_SALTLEN_DIGEST = -1
+    
+    def __init__(self, lib: ctypes.CDLL, key_data: bytes):
+        self._lib = lib
+        self._sha256 = lib.EVP_sha256()
+        bio = lib.BIO_new_mem_buf(key_data, len(key_data))
+        try:
+            self._pkey = lib.PEM_read_bio_PrivateKey(bio, None, None, None)
+        finally:
+            lib.BIO_free(bio)
+        if not self._pkey:
+            raise ValueError("OpenSSL could not read the private key")
+        self._sig_size = lib.EVP_PKEY_get_size(self._pkey)
+        # EVP_MD_CTX and output buffer per thread (presign and page pools sign too)
+        self._local = threading.local()
+    
+    def __del__(self):
+        if getattr(self, "_pkey", None):
+            self._lib.EVP_PKEY_free(self._pkey)
+    
+    def _thread_state(self) -> Tuple[int, ctypes.Array]:
+        state = getattr(self._local, "state", None)
+        if state is None:
+            state = self._local.state = _MdCtx(self._lib, self._sig_size)
+        return state.ctx, state.buf
+    
+    def sign(self, message: bytes) -> bytes:
+        lib = self._lib
+        ctx, buf = self._thread_state()
+        pctx = ctypes.c_void_p()
+        siglen = ctypes.c_size_t(self._sig_size)
+        lib.EVP_MD_CTX_reset(ctx)
+        if not (
+            lib.EVP_DigestSignInit(ctx, ctypes.byref(pctx), self._sha256, None, self._pkey) == 1
+            and lib.EVP_PKEY_CTX_set_rsa_padding(pctx, self.RSA_PKCS1_PSS_PADDING) == 1
+            and lib.EVP_PKEY_CTX_set_rsa_pss_saltlen(pctx, self.RSA_PSS_SALTLEN_DIGEST) == 1
+            and lib.EVP_PKEY_CTX_set_rsa_mgf1_md(pctx, self._sha256) == 1
+            and lib.EVP_DigestSign(ctx, buf, ctypes.byref(siglen), message, len(message)) == 1
+        ):
+            raise RuntimeError("OpenSSL RSA-PSS signing failed")
+        return buf.raw[:siglen.value]
+
+
+class _MdCtx:
+    """A thread's EVP_MD_CTX and signature buffer, freed with the thread."""
+    
+    __slots__ = ("_lib", "ctx", "buf")
+    
+    def __init__(self, lib: ctypes.CDLL, size: int):
+        self._lib = lib
+        self.ctx = lib.EVP_MD_CTX_new()
+        self.buf = ctypes.create_string_buffer(size)
+    
+    def __del__(self):
+        if self.ctx:
+            self._lib.EVP_MD_CTX_free(self.ctx)
+
+
+# Per-ticker paths are requested over and over (orderbook polling), so each
+# is built once
+@lru_cache(maxsize=4096)
+def _market_path(ticker: str) -> str:
+    return f"/trade-api/v2/markets/{ticker}"
+
+
+@lru_cache(maxsize=4096)
+def _orderbook_path(ticker: str) -> str:
+    return f"/trade-api/v2/markets/{ticker}/orderbook"
+
+
+@lru_cache(maxsize=4096)
+def _event_path(event_ticker: str) -> str:
+    return f"/trade-api/v2/events/{event_ticker}"
 
 
 class KalshiClient:
@@ -24,80 +184,263 @@ class KalshiClient:
         )
         balance = client.get_balance()
         print(f"Balance: ${balance['balance'] / 100:.2f}")
+    
+    The client keeps a pooled HTTP/2 connection; call close() (or use it
+    as a context manager) when done.
+    
+    algorithm="ecdsa-p256" signs with a P-256 key instead of RSA-PSS, which is
+    cheaper per request; only use it with an API key registered as ECDSA.
+    
+    With KALSHI_FAST_SIGN=1, RSA-PSS signatures are made by calling OpenSSL's
+    libcrypto directly through ctypes; falls back to cryptography when
+    libcrypto 3 can't be loaded.
+    
+    Signed headers for GETs are reused for signature_ttl seconds per path, well
+    inside the window Kalshi accepts a timestamp for; 0 signs every request.
     """
     
+    TIMEOUT = httpx.Timeout(10.0, connect=3.0)
+    LIMITS = httpx.Limits(max_keepalive_connections=8, max_connections=32)
+    # Gateway errors are retried with exponential backoff for idempotent methods
+    RETRY_STATUSES = frozenset({502, 503, 504})
+    RETRY_METHODS = frozenset({"GET", "DELETE"})
+    MAX_RETRIES = 3
+    BACKOFF = 0.1  # seconds
+    SIG_CACHE_MAX = 1024  # cached paths before the cache is cleared
+    MAX_PAGE_LIMIT = 1000  # largest page the list endpoints accept
+    
     def __init__(
         self,
         api_key_id: str,
         private_key_path: Optional[str] = None,
         private_key_pem: Optional[str] = None,
-        base_url: str = "https://api.elections.kalshi.com"
+        base_url: str = "https://api.elections.kalshi.com",
+        algorithm: str = "rsa-pss",
+        signature_ttl: float = 2.0,
     ):
+        if algorithm not in SIGNING_ALGORITHMS:
+            raise ValueError(f"algorithm must be one of {SIGNING_ALGORITHMS}, got {algorithm!r}")
         self.api_key_id = api_key_id
         self.base_url = base_url
+        self.algorithm = algorithm
+        self.signature_ttl = signature_ttl
+        # signing suffix -> (monotonic time signed, headers), GETs only
+        self._sig_cache: Dict[bytes, Tuple[float, Dict[str, str]]] = {}
+        self._sig_lock = threading.Lock()
+        # Single worker that signs ahead of time for presign(); its thread is
+        # only started on first use
+        self._sig_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kalshi-sign")
+        # Background fetches: the next page for the iter_* helpers, and the
+        # calls snapshot() runs alongside its own
+        self._page_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="kalshi-page")
         
         # Load private key
         if private_key_pem:
             key_data = private_key_pem.encode() if isinstance(private_key_pem, str) else private_key_pem
         elif private_key_path:
-            path = os.path.expanduser(private_key_path)
-            with open(path, "rb") as f:
+            with open(_expanded_path(private_key_path), "rb") as f:
                 key_data = f.read()
         else:
             raise ValueError("Must provide either private_key_path or private_key_pem")
         
-        self.private_key = serialization.load_pem_private_key(
-            key_data, password=None, backend=default_backend()
+        self.private_key = _load_private_key(bytes(key_data))
+        if algorithm == "rsa-pss" and not isinstance(self.private_key, rsa.RSAPrivateKey):
+            raise ValueError("algorithm 'rsa-pss' needs an RSA private key")
+        if algorithm == "ecdsa-p256" and not (
+            isinstance(self.private_key, ec.EllipticCurvePrivateKey)
+            and isinstance(self.private_key.curve, ec.SECP256R1)
+        ):
+            raise ValueError("algorithm 'ecdsa-p256' needs a P-256 (secp256r1) private key")
+        # Bound sign() and its fixed arguments, so _sign() does no lookups
+        # or branching per request
+        self._key_sign = self.private_key.sign
+        self._sign_args = (_ECDSA_SHA256,) if algorithm == "ecdsa-p256" else (_PSS_PADDING, _SHA256)
+        if algorithm == "rsa-pss" and os.environ.get("KALSHI_FAST_SIGN") == "1":
+            lib = _libcrypto()
+            if lib is not None:
+                self._key_sign = _OpenSSLSigner(lib, bytes(key_data)).sign
+                self._sign_args = ()
+        
+        # One HTTP/2 client for all calls: the connection is reused and
+        # concurrent requests are multiplexed over it
+        self._client = self._make_client()
+    
+    def _static_headers(self) -> Dict[str, str]:
+        """Headers that never change, set once on the HTTP client."""
+        return {
+            "Content-Type": "application/json",
+            "KALSHI-ACCESS-KEY": self.api_key_id,
+        }
+    
+    def _make_client(self) -> httpx.Client:
+        # Transport-level retries cover failed connects
+        return httpx.Client(
+            base_url=self.base_url,
+            timeout=self.TIMEOUT,
+            headers=self._static_headers(),
+            transport=httpx.HTTPTransport(http2=True, limits=self.LIMITS, retries=self.MAX_RETRIES),
         )
     
-    def _sign(self, timestamp: str, method: str, path: str) -> str:
-        """Generate RSA-PSS signature for request."""
-        # Strip query params for signing
-        path_without_query = path.split("?")[0]
-        message = f"{timestamp}{method}{path_without_query}".encode("utf-8")
-        
-        signature = self.private_key.sign(
-            message,
-            padding.PSS(
-                mgf=padding.MGF1(hashes.SHA256()),
-                salt_length=padding.PSS.DIGEST_LENGTH
-            ),
-            hashes.SHA256()
+    def _should_retry(self, response: httpx.Response, method: str, attempt: int) -> bool:
+        return (
+            response.status_code in self.RETRY_STATUSES
+            and method in self.RETRY_METHODS
+            and attempt < self.MAX_RETRIES
         )
-        return base64.b64encode(signature).decode("utf-8")
     
-    def _headers(self, method: str, path: str) -> Dict[str, str]:
-        """Generate authenticated headers."""
-        timestamp = str(int(datetime.datetime.now().timestamp() * 1000))
-        signature = self._sign(timestamp, method, path)
+    def close(self) -> None:
+        """Close pooled connections."""
+        self._client.close()
+        self._sig_pool.shutdown(wait=False)
+        self._page_pool.shutdown(wait=False)
+    
+    def __enter__(self) -> "KalshiClient":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    @staticmethod
+    def _signing_suffix(method: str, path: str) -> bytes:
+        """The method + path part of the signed message (query params stripped)."""
+        # Endpoint methods pass query params separately, so there is usually no
+        # "?" and partition() hands back the path itself
+        return (method + path.partition("?")[0]).encode("utf-8")
+    
+    def _sign(self, ts_bytes: bytes, msg_suffix: bytes) -> str:
+        """Generate RSA-PSS (or ECDSA, DER-encoded) signature for request."""
+        signature = self._key_sign(ts_bytes + msg_suffix, *self._sign_args)
+        return binascii.b2a_base64(signature, newline=False).decode("ascii")
+    
+    def _headers(self, msg_suffix: bytes, cacheable: bool = False) -> Dict[str, str]:
+        """
+        Authenticated headers for a _signing_suffix(). With cacheable=True
+        (idempotent GETs), headers signed within signature_ttl are reused.
+        """
+        if not cacheable or self.signature_ttl <= 0:
+            return self._signed_headers(msg_suffix)
+        
+        now = time.monotonic()
+        with self._sig_lock:
+            cached = self._sig_cache.get(msg_suffix)
+        if cached is not None and now - cached[0] < self.signature_ttl:
+            return cached[1]
+        
+        headers = self._signed_headers(msg_suffix)
+        with self._sig_lock:
+            if len(self._sig_cache) >= self.SIG_CACHE_MAX:
+                self._sig_cache.clear()
+            self._sig_cache[msg_suffix] = (now, headers)
+        return headers
+    
+    def _signed_headers(self, msg_suffix: bytes) -> Dict[str, str]:
+        timestamp = str(time.time_ns() // 1_000_000)
+        signature = self._sign(timestamp.encode("ascii"), msg_suffix)
         
+        # Merged over the client's _static_headers() by httpx
         return {
-            "KALSHI-ACCESS-KEY": self.api_key_id,
             "KALSHI-ACCESS-SIGNATURE": signature,
             "KALSHI-ACCESS-TIMESTAMP": timestamp,
-            "Content-Type": "application/json",
         }
     
+    def presign(self, method: str, path: str) -> "Future[Dict[str, str]]":
+        """
+        Start signing a request on a worker thread, so the signature for the
+        next call is computed while the current one is on the network. Pass
+        the future to request(..., presigned=...) within the timestamp window.
+        """
+        msg_suffix = self._signing_suffix(method, path)
+        return self._sig_pool.submit(self._headers, msg_suffix, method == "GET")
+    
+    def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict] = None,
+        json: Optional[Dict] = None,
+        presigned: Optional["Future[Dict[str, str]]"] = None,
+    ) -> Dict[str, Any]:
+        """Make an authenticated request to any endpoint, optionally with presign() headers."""
+        return self._request(method, path, params=params, json=json, presigned=presigned)
+    
     def _request(
         self,
         method: str,
         path: str,
         params: Optional[Dict] = None,
-        json: Optional[Dict] = None
+        json: Optional[Dict] = None,
+        presigned: Optional["Future[Dict[str, str]]"] = None,
     ) -> Dict[str, Any]:
         """Make authenticated request."""
-        url = self.base_url + path
-        headers = self._headers(method, path)
-        
-        response = requests.request(
-            method=method,
-            url=url,
-            headers=headers,
-            params=params,
-            json=json
-        )
-        response.raise_for_status()
-        return response.json()
+        msg_suffix = self._signing_suffix(method, path)
+        cacheable = method == "GET"
+        body = _encode_body(json) if json is not None else None
+        attempt = 0
+        while True:
+            # Re-sign on every retry so the timestamp stays fresh
+            if attempt == 0 and presigned is not None:
+                headers = presigned.result()
+            else:
+                headers = self._headers(msg_suffix, cacheable)
+            response = self._client.request(
+                method,
+                path,
+                headers=headers,
+                params=params,
+                content=body,
+            )
+            if self._should_retry(response, method, attempt):
+                time.sleep(self.BACKOFF * 2 ** attempt)
+                attempt += 1
+                continue
+            response.raise_for_status()
+            return _decode_body(response.content)
+    
+    def _paginate(self, fetch: Callable[..., Dict[str, Any]], key: str, kwargs: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Yield every item under `key` across all pages of a cursor endpoint.
+        The next page is requested as soon as a cursor is known, so its
+        round-trip overlaps with the caller consuming the current page.
+        """
+        kwargs.pop("cursor", None)
+        page = fetch(**kwargs)
+        while True:
+            cursor = page.get("cursor")
+            pending = self._page_pool.submit(fetch, cursor=cursor, **kwargs) if cursor else None
+            try:
+                yield from page.get(key) or ()
+            except GeneratorExit:
+                # Caller stopped early: don't leave a fetch queued
+                if pending is not None:
+                    pending.cancel()
+                raise
+            if pending is None:
+                return
+            page = pending.result()
+    
+    def iter_positions(self, **kwargs) -> Iterator[Dict[str, Any]]:
+        """Iterate over all market positions, fetching pages ahead."""
+        return self._paginate(self.get_positions, "market_positions", kwargs)
+    
+    def iter_settlements(self, **kwargs) -> Iterator[Dict[str, Any]]:
+        """Iterate over all portfolio settlements, fetching pages ahead."""
+        return self._paginate(self.get_portfolio_settlements, "settlements", kwargs)
+    
+    def iter_orders(self, **kwargs) -> Iterator[Dict[str, Any]]:
+        """Iterate over all orders matching get_orders() filters, fetching pages ahead."""
+        return self._paginate(self.get_orders, "orders", kwargs)
+    
+    def iter_markets(self, **kwargs) -> Iterator[Dict[str, Any]]:
+        """Iterate over all markets matching get_markets() filters, fetching pages ahead."""
+        return self._paginate(self.get_markets, "markets", kwargs)
+    
+    def iter_trades(self, **kwargs) -> Iterator[Dict[str, Any]]:
+        """Iterate over all trades matching get_trades() filters, fetching pages ahead."""
+        return self._paginate(self.get_trades, "trades", kwargs)
+    
+    def iter_events(self, **kwargs) -> Iterator[Dict[str, Any]]:
+        """Iterate over all events matching get_events() filters, fetching pages ahead."""
+        return self._paginate(self.get_events, "events", kwargs)
     
     # ─────────────────────────────────────────────────────────────
     # Portfolio
@@ -114,6 +457,17 @@ class KalshiClient:
             params["cursor"] = cursor
         return self._request("GET", "/trade-api/v2/portfolio/positions", params=params)
     
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Balance, positions and resting orders in one go, as
+        {"balance": ..., "positions": ..., "orders": ...}. The three requests
+        run concurrently, so this costs about one round-trip instead of three.
+        """
+        positions = self._page_pool.submit(self.get_positions)
+        orders = self._page_pool.submit(self.get_orders, status="resting")
+        balance = self.get_balance()
+        return {"balance": balance, "positions": positions.result(), "orders": orders.result()}
+    
     def get_portfolio_settlements(self, limit: int = 100, cursor: Optional[str] = None) -> Dict[str, Any]:
         """Get portfolio settlement history."""
         params = {"limit": limit}
@@ -222,13 +576,44 @@ class KalshiClient:
             params["status"] = status
         return self._request("GET", "/trade-api/v2/markets", params=params)
     
+    def get_markets_bulk(self, **filters) -> List[Dict[str, Any]]:
+        """
+        All markets matching get_markets() filters, fetched in pages of
+        MAX_PAGE_LIMIT. Prefer this to get_market() per ticker when scanning.
+        """
+        return list(self.iter_markets(limit=self.MAX_PAGE_LIMIT, **filters))
+    
     def get_market(self, ticker: str) -> Dict[str, Any]:
         """Get a single market by ticker."""
-        return self._request("GET", f"/trade-api/v2/markets/{ticker}")
+        return self._request("GET", _market_path(ticker))
     
     def get_orderbook(self, ticker: str, depth: int = 10) -> Dict[str, Any]:
         """Get orderbook for a market."""
-        return self._request("GET", f"/trade-api/v2/markets/{ticker}/orderbook", params={"depth": depth})
+        return self._request("GET", _orderbook_path(ticker), params={"depth": depth})
+    
+    @staticmethod
+    def _top_of_book(doc: Dict[str, Any]) -> Tuple[Optional[int], Optional[int], Optional[int], Optional[int]]:
+        # Kalshi lists only bids per side as [price, quantity] levels; a yes
+        # ask is the complement of the best no bid and vice versa
+        book = doc.get("orderbook") or {}
+        yes_levels = book.get("yes") or ()
+        no_levels = book.get("no") or ()
+        yes_bid = max((level[0] for level in yes_levels), default=None)
+        no_bid = max((level[0] for level in no_levels), default=None)
+        return (
+            yes_bid,
+            100 - no_bid if no_bid is not None else None,
+            no_bid,
+            100 - yes_bid if yes_bid is not None else None,
+        )
+    
+    def get_orderbook_top(self, ticker: str) -> Tuple[Optional[int], Optional[int], Optional[int], Optional[int]]:
+        """
+        Best prices for a market as (yes_bid, yes_ask, no_bid, no_ask) in
+        cents, None where a side is empty. Requests depth 1 so only the top
+        level is sent and parsed.
+        """
+        return self._top_of_book(self.get_orderbook(ticker, depth=1))
     
     def get_trades(
         self,
@@ -267,7 +652,7 @@ class KalshiClient:
     
     def get_event(self, event_ticker: str) -> Dict[str, Any]:
         """Get a single event."""
-        return self._request("GET", f"/trade-api/v2/events/{event_ticker}")
+        return self._request("GET", _event_path(event_ticker))
     
     # ─────────────────────────────────────────────────────────────
     # Exchange
@@ -278,6 +663,142 @@ class KalshiClient:
         return self._request("GET", "/trade-api/v2/exchange/status")
 
 
+class AsyncKalshiClient(KalshiClient):
+    """
+    Asyncio variant of KalshiClient over httpx.AsyncClient.
+    
+    Has the same endpoint methods, but each returns a coroutine, so
+    independent calls can run concurrently over one HTTP/2 connection:
+    
+        async with AsyncKalshiClient(api_key_id=..., private_key_path=...) as client:
+            books = await client.get_orderbooks(["TICKER-A", "TICKER-B"])
+    
+    The iter_* helpers are async generators that fetch the next page ahead.
+    When breaking out of one early, close it so that fetch is cancelled:
+    
+        async with contextlib.aclosing(client.iter_markets(status="open")) as markets:
+            async for market in markets:
+                ...
+    
+    close() also cancels any page fetches still in flight.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Next-page fetches started by _paginate, cancelled by close()
+        self._prefetches: Set["asyncio.Task[Dict[str, Any]]"] = set()
+    
+    def _make_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.TIMEOUT,
+            headers=self._static_headers(),
+            transport=httpx.AsyncHTTPTransport(http2=True, limits=self.LIMITS, retries=self.MAX_RETRIES),
+        )
+    
+    async def close(self) -> None:
+        """Cancel in-flight page fetches and close pooled connections."""
+        prefetches = list(self._prefetches)
+        for task in prefetches:
+            task.cancel()
+        await asyncio.gather(*prefetches, return_exceptions=True)
+        await self._client.aclose()
+        self._sig_pool.shutdown(wait=False)
+        self._page_pool.shutdown(wait=False)
+    
+    def __enter__(self) -> "AsyncKalshiClient":
+        # close() is a coroutine here; a plain `with` would never await it
+        raise TypeError("AsyncKalshiClient must be used with 'async with'")
+    
+    def __exit__(self, *exc_info) -> None:
+        raise TypeError("AsyncKalshiClient must be used with 'async with'")
+    
+    async def __aenter__(self) -> "AsyncKalshiClient":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+    
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict] = None,
+        json: Optional[Dict] = None,
+        presigned: Optional["Future[Dict[str, str]]"] = None,
+    ) -> Dict[str, Any]:
+        """Make authenticated request."""
+        msg_suffix = self._signing_suffix(method, path)
+        cacheable = method == "GET"
+        body = _encode_body(json) if json is not None else None
+        attempt = 0
+        while True:
+            if attempt == 0 and presigned is not None:
+                headers = await asyncio.wrap_future(presigned)
+            else:
+                headers = self._headers(msg_suffix, cacheable)
+            response = await self._client.request(
+                method,
+                path,
+                headers=headers,
+                params=params,
+                content=body,
+            )
+            if self._should_retry(response, method, attempt):
+                await asyncio.sleep(self.BACKOFF * 2 ** attempt)
+                attempt += 1
+                continue
+            response.raise_for_status()
+            return _decode_body(response.content)
+    
+    async def _paginate(self, fetch: Callable[..., Any], key: str, kwargs: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Async counterpart of KalshiClient._paginate; the iter_* helpers are async iterators here."""
+        kwargs.pop("cursor", None)
+        pending: Optional["asyncio.Task[Dict[str, Any]]"] = None
+        try:
+            page = await fetch(**kwargs)
+            while True:
+                cursor = page.get("cursor")
+                if cursor:
+                    pending = asyncio.ensure_future(fetch(cursor=cursor, **kwargs))
+                    self._prefetches.add(pending)
+                    pending.add_done_callback(self._prefetches.discard)
+                for item in page.get(key) or ():
+                    yield item
+                if pending is None:
+                    return
+                page = await pending
+                pending = None
+        finally:
+            # Closed early (aclose(), or garbage-collected unfinished): stop
+            # the prefetch and collect its outcome so nothing is left unretrieved
+            if pending is not None:
+                pending.cancel()
+                await asyncio.gather(pending, return_exceptions=True)
+    
+    async def get_orderbooks(self, tickers: List[str], depth: int = 10) -> Dict[str, Dict[str, Any]]:
+        """Fetch several orderbooks concurrently, keyed by ticker."""
+        books = await asyncio.gather(*(self.get_orderbook(ticker, depth=depth) for ticker in tickers))
+        return dict(zip(tickers, books))
+    
+    async def snapshot(self) -> Dict[str, Any]:
+        """Balance, positions and resting orders fetched concurrently, see KalshiClient.snapshot."""
+        balance, positions, orders = await asyncio.gather(
+            self.get_balance(),
+            self.get_positions(),
+            self.get_orders(status="resting"),
+        )
+        return {"balance": balance, "positions": positions, "orders": orders}
+    
+    async def get_markets_bulk(self, **filters) -> List[Dict[str, Any]]:
+        """All markets matching get_markets() filters, see KalshiClient.get_markets_bulk."""
+        return [market async for market in self.iter_markets(limit=self.MAX_PAGE_LIMIT, **filters)]
+    
+    async def get_orderbook_top(self, ticker: str) -> Tuple[Optional[int], Optional[int], Optional[int], Optional[int]]:
+        """Best prices for a market as (yes_bid, yes_ask, no_bid, no_ask), see KalshiClient.get_orderbook_top."""
+        return self._top_of_book(await self.get_orderbook(ticker, depth=1))
+
+
 # ─────────────────────────────────────────────────────────────────
 # Convenience factory
 # ─────────────────────────────────────────────────────────────────
@@ -292,10 +813,12 @@ def create_client_from_env() -> KalshiClient:
         
     Optional:
         KALSHI_BASE_URL: API base URL (default: https://api.elections.kalshi.com)
+        KALSHI_KEY_ALGORITHM: "rsa-pss" (default) or "ecdsa-p256"
     """
     api_key_id = os.environ.get("KALSHI_API_KEY_ID")
     private_key_path = os.environ.get("KALSHI_PRIVATE_KEY_PATH", "~/.kalshi/private_key.pem")
     base_url = os.environ.get("KALSHI_BASE_URL", "https://api.elections.kalshi.com")
+    algorithm = os.environ.get("KALSHI_KEY_ALGORITHM", "rsa-pss")
     
     if not api_key_id:
         raise ValueError("KALSHI_API_KEY_ID environment variable required")
@@ -303,7 +826,8 @@ def create_client_from_env() -> KalshiClient:
     return KalshiClient(
         api_key_id=api_key_id,
         private_key_path=private_key_path,
-        base_url=base_url
+        base_url=base_url,
+        algorithm=algorithm,
     )
 
 
@@ -24,6 +24,9 @@ class AgentWalletClient {
     }
 
     const response = await fetch(url, options);
+    if (response.status === 204) {
+      return null;
+    }
     const data = await response.json();
 
     if (!response.ok) {
@@ -163,6 +166,18 @@ class AgentWalletClient {
     });
   }
 
+  /**
+   * Approve or deny several pending requests in one call
+   * @param {Array<{requestId: string, approved: boolean, approver?: string}>} decisions
+   */
+  async processApprovals(decisions) {
+    return this.request('POST', '/approvals/batch', decisions.map(({ requestId, approved, approver = '' }) => ({
+      request_id: requestId,
+      approved,
+      approver,
+    })));
+  }
+
   // ─────────────────────────────────────────────────────────────
   // Kill Switch
   // ─────────────────────────────────────────────────────────────
@@ -193,8 +208,9 @@ class AgentWalletClient {
    * @param {object} rule.conditionParams - Parameters for the condition
    * @param {string} rule.action - One of: allow, deny, require_approval
    * @param {number} rule.priority - Higher = evaluated first
+   * @param {string[]} [rule.appliesTo] - Action types the rule runs for (e.g. ['create_order']); inferred from conditionType if omitted
    */
-  async createRule({ ruleId, name, description, conditionType, conditionParams, action, priority = 0 }) {
+  async createRule({ ruleId, name, description, conditionType, conditionParams, action, priority = 0, appliesTo = null }) {
     return this.request('POST', '/rules', {
       rule_id: ruleId,
       name,
@@ -203,6 +219,7 @@ class AgentWalletClient {
       condition_params: conditionParams,
       action,
       priority,
+      applies_to: appliesTo,
     });
   }
 
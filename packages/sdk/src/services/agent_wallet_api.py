@@ -6,28 +6,49 @@ Run with: uvicorn agent_wallet_api:app --reload --port 8100
 """
 
 import os
-from typing import Optional, List, Dict, Any
-from datetime import datetime
-from contextlib import asynccontextmanager
-
-from fastapi import FastAPI, HTTPException, Depends, Header
+import json
+import asyncio
+import secrets
+from typing import Optional, List, Dict, Any, Literal, Callable
+from datetime import datetime, timezone
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass, asdict
+
+import orjson
+from cachetools import TTLCache
+from fastapi import FastAPI, HTTPException, Depends, Header, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 
 from agent_wallet_kalshi import (
+    AgentWallet,
     AgentWalletManager,
     SpendLimit,
     Rule,
     RuleResult,
     ActionType,
+    ACTION_TYPE_NAMES,
+    AuditEventType,
+    EvalContext,
+    compile_condition,
 )
 
+Condition = Callable[[EvalContext], bool]
+
 
 # ─────────────────────────────────────────────────────────────────
 # Pydantic Models (Request/Response)
 # ─────────────────────────────────────────────────────────────────
 
+# Request bodies are read-only once parsed; unknown fields are rejected
+REQUEST_MODEL_CONFIG = ConfigDict(frozen=True, extra="forbid")
+
+
 class SpendLimitCreate(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+
     max_per_order: int = Field(5000, description="Max cents per order")
     max_per_day: int = Field(20000, description="Max cents per day")
     max_per_week: int = Field(50000, description="Max cents per week")
@@ -37,13 +58,19 @@ class SpendLimitCreate(BaseModel):
 
 
 class AgentCreate(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+
     name: str
     description: str = ""
     spend_limit: Optional[SpendLimitCreate] = None
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
 
+# Documents the agent shape in the OpenAPI schema. Handlers return the Agent
+# dataclass fields directly, so outgoing data isn't validated a second time.
 class AgentResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
     agent_id: str
     name: str
     description: str
@@ -52,51 +79,288 @@ class AgentResponse(BaseModel):
     metadata: Dict[str, Any]
 
 
+# Built once at import; validates a whole agent list in a single pydantic-core call
+agent_list_adapter = TypeAdapter(List[AgentResponse])
+
+
 class OrderCreate(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+
     ticker: str
-    side: str = Field(..., pattern="^(yes|no)$")
-    action: str = Field(..., pattern="^(buy|sell)$")
+    side: Literal["yes", "no"]
+    action: Literal["buy", "sell"]
     count: int = Field(..., gt=0)
-    type: str = Field("limit", pattern="^(limit|market)$")
+    type: Literal["limit", "market"] = "limit"
     yes_price: Optional[int] = Field(None, ge=1, le=99)
     no_price: Optional[int] = Field(None, ge=1, le=99)
     client_order_id: Optional[str] = None
 
 
+# Action names rules can be restricted to, kept in step with ActionType
+ActionName = Literal[tuple(ACTION_TYPE_NAMES.values())]
+
+
 class RuleCreate(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+
     rule_id: str
     name: str
     description: str
     condition_type: str  # "max_order_value", "ticker_block", "time_block", etc.
     condition_params: Dict[str, Any]
-    action: str = Field(..., pattern="^(allow|deny|require_approval)$")
+    action: Literal["allow", "deny", "require_approval"]
     priority: int = 0
+    # Restrict the rule to these actions; by default it's inferred from condition_type
+    applies_to: Optional[List[ActionName]] = None
 
 
 class KillSwitchRequest(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+
     reason: str = ""
 
 
 class ApprovalRequest(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+
     request_id: str
     approved: bool
     approver: str = ""
 
 
+# ─────────────────────────────────────────────────────────────────
+# Approval Storage
+# ─────────────────────────────────────────────────────────────────
+
+@dataclass(slots=True)
+class PendingApproval:
+    """An order held back by a require_approval rule."""
+    request_id: str
+    agent_id: str
+    order: Dict[str, Any]
+    created_at: str
+    reason: str
+    status: str = "pending"  # pending | processing | approved | denied | failed
+    approved_by: Optional[str] = None
+    approved_at: Optional[str] = None
+    denied_by: Optional[str] = None
+    denied_at: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+class ApprovalStore:
+    """
+    In-process approval storage.
+    Fine for a single worker; approvals are lost on restart.
+    """
+    
+    def __init__(self):
+        self.approvals: Dict[str, PendingApproval] = {}
+        # Ids still awaiting a decision, so listing doesn't scan the full history
+        self.pending_ids: set[str] = set()
+    
+    async def create(self, approval: PendingApproval) -> None:
+        self.approvals[approval.request_id] = approval
+        self.pending_ids.add(approval.request_id)
+    
+    async def get(self, request_id: str) -> Optional[PendingApproval]:
+        return self.approvals.get(request_id)
+    
+    async def claim(self, request_id: str) -> bool:
+        """
+        Move a pending request to "processing" so only one caller acts on it.
+        Returns False if it isn't pending (already claimed or decided).
+        """
+        # No await in here, so the check and the claim can't interleave with
+        # another request on the event loop
+        approval = self.approvals.get(request_id)
+        if approval is None or approval.status != "pending":
+            return False
+        approval.status = "processing"
+        self.pending_ids.discard(request_id)
+        return True
+    
+    async def update(self, request_id: str, fields: Dict[str, Any]) -> None:
+        approval = self.approvals[request_id]
+        for name, value in fields.items():
+            setattr(approval, name, value)
+        if approval.status == "pending":
+            self.pending_ids.add(request_id)
+        else:
+            self.pending_ids.discard(request_id)
+    
+    async def list_pending(self) -> List[PendingApproval]:
+        return [self.approvals[i] for i in self.pending_ids]
+    
+    async def close(self) -> None:
+        pass
+
+
+class RedisApprovalStore(ApprovalStore):
+    """
+    Approval storage in Redis hashes (approval:<request_id>), with the ids
+    awaiting a decision indexed in a set.
+    Survives restarts and every worker sees the same approvals, but agents and
+    their wallets still live in one process: only the worker that created an
+    agent can place its approved orders (others answer 404 without claiming).
+    """
+    
+    KEY_PREFIX = "approval:"
+    PENDING_KEY = "approvals:pending"
+    TTL_SECONDS = 86400
+    # Hash values are flat strings; these fields hold nested data
+    JSON_FIELDS = ("order", "result")
+    
+    def __init__(self, redis):
+        self.redis = redis
+    
+    def _encode(self, fields: Dict[str, Any]) -> Dict[str, str]:
+        return {
+            k: json.dumps(v) if k in self.JSON_FIELDS else str(v)
+            for k, v in fields.items()
+            if v is not None
+        }
+    
+    def _decode(self, raw: Dict[str, str]) -> PendingApproval:
+        return PendingApproval(**{
+            k: json.loads(v) if k in self.JSON_FIELDS else v
+            for k, v in raw.items()
+        })
+    
+    async def create(self, approval: PendingApproval) -> None:
+        key = self.KEY_PREFIX + approval.request_id
+        await self.redis.hset(key, mapping=self._encode(asdict(approval)))
+        await self.redis.expire(key, self.TTL_SECONDS)
+        await self.redis.sadd(self.PENDING_KEY, approval.request_id)
+    
+    async def get(self, request_id: str) -> Optional[PendingApproval]:
+        raw = await self.redis.hgetall(self.KEY_PREFIX + request_id)
+        return self._decode(raw) if raw else None
+    
+    async def claim(self, request_id: str) -> bool:
+        # Compare-and-set on status with WATCH/MULTI, so only one worker
+        # process wins; the transaction is retried if the hash changes mid-way
+        from redis.exceptions import WatchError
+        
+        key = self.KEY_PREFIX + request_id
+        async with self.redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(key)
+                    if await pipe.hget(key, "status") != "pending":
+                        await pipe.unwatch()
+                        return False
+                    pipe.multi()
+                    pipe.hset(key, "status", "processing")
+                    pipe.srem(self.PENDING_KEY, request_id)
+                    await pipe.execute()
+                    return True
+                except WatchError:
+                    continue
+    
+    async def update(self, request_id: str, fields: Dict[str, Any]) -> None:
+        await self.redis.hset(self.KEY_PREFIX + request_id, mapping=self._encode(fields))
+        status = fields.get("status")
+        if status == "pending":
+            await self.redis.sadd(self.PENDING_KEY, request_id)
+        elif status is not None:
+            await self.redis.srem(self.PENDING_KEY, request_id)
+    
+    async def list_pending(self) -> List[PendingApproval]:
+        request_ids = list(await self.redis.smembers(self.PENDING_KEY))
+        if not request_ids:
+            return []
+        # One round trip for all the hashes instead of one per id
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for request_id in request_ids:
+                pipe.hgetall(self.KEY_PREFIX + request_id)
+            raws = await pipe.execute()
+        
+        pending = []
+        stale = []
+        for request_id, raw in zip(request_ids, raws):
+            if raw:
+                pending.append(self._decode(raw))
+            else:
+                stale.append(request_id)
+        if stale:
+            # Hashes expired; drop the stale index entries
+            await self.redis.srem(self.PENDING_KEY, *stale)
+        return pending
+    
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
 # ─────────────────────────────────────────────────────────────────
 # Global State
 # ─────────────────────────────────────────────────────────────────
 
 manager: Optional[AgentWalletManager] = None
 
-# Pending approvals storage (in production, use Redis or DB)
-pending_approvals: Dict[str, Dict[str, Any]] = {}
+# Pending approvals; backed by Redis when REDIS_URL is set
+approval_store: Optional[ApprovalStore] = None
+
+# Short-lived caches for exchange reads. Dashboards poll these endpoints far
+# faster than balances or market lists change, so bursts are served from
+# memory instead of hitting Kalshi every time.
+balance_cache: TTLCache = TTLCache(maxsize=1024, ttl=5)
+markets_cache: TTLCache = TTLCache(maxsize=1024, ttl=5)
+
+
+def can_use_cache(wallet: AgentWallet, action_type: ActionType) -> bool:
+    """
+    Cached reads bypass the wallet's controls, so they are only served when
+    those would allow the read anyway: kill switch off, agent active and no
+    active rule that applies to the action.
+    """
+    return (
+        not wallet.is_kill_switch_active
+        and wallet.agent.is_active
+        and not wallet.rules_engine.has_rules_for(action_type)
+    )
+
+
+def get_cached_read(
+    wallet: AgentWallet,
+    action_type: ActionType,
+    request_data: Dict[str, Any],
+    cache: TTLCache,
+    key: Any,
+) -> Optional[Dict[str, Any]]:
+    """A cached response the wallet may be served, audited like a live read; None on a miss."""
+    if not can_use_cache(wallet, action_type):
+        return None
+    cached = cache.get(key)
+    if cached is not None:
+        wallet.audit_logger.create_event(
+            agent_id=wallet.agent.agent_id,
+            event_type=AuditEventType.ACTION_EXECUTED,
+            action_type=action_type,
+            request_data=request_data,
+            response_data=cached,
+            metadata={"cached": True},
+        )
+    return cached
+
+
+def invalidate_balances() -> None:
+    """Drop cached balances after anything that moves money or resting orders."""
+    balance_cache.clear()
+
+
+async def refresh_clock(app: FastAPI, interval: float = 0.1):
+    """Keep app.state.now_iso current so handlers don't format a timestamp per request."""
+    while True:
+        app.state.now_iso = datetime.now(timezone.utc).isoformat()
+        await asyncio.sleep(interval)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize manager on startup."""
-    global manager
+    """Initialize manager and approval storage on startup."""
+    global manager, approval_store
     
     api_key_id = os.environ.get("KALSHI_API_KEY_ID")
     private_key_path = os.environ.get("KALSHI_PRIVATE_KEY_PATH", "~/.kalshi/private_key.pem")
@@ -111,8 +375,23 @@ async def lifespan(app: FastAPI):
         audit_log_file="agent_wallet_audit.jsonl",
     )
     
+    redis_url = os.environ.get("REDIS_URL")
+    if redis_url:
+        import redis.asyncio as aioredis
+        approval_store = RedisApprovalStore(aioredis.from_url(redis_url, decode_responses=True))
+    else:
+        approval_store = ApprovalStore()
+    
+    clock_task = asyncio.create_task(refresh_clock(app))
+    
     print(f"AgentWallet API started with Kalshi key: {api_key_id[:8]}...")
     yield
+    clock_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await clock_task
+    await run_in_threadpool(manager.audit_logger.close)
+    manager.kalshi_client.close()
+    await approval_store.close()
     print("AgentWallet API shutting down")
 
 
@@ -120,13 +399,53 @@ async def lifespan(app: FastAPI):
 # FastAPI App
 # ─────────────────────────────────────────────────────────────────
 
+def _orjson_default(obj: Any) -> Any:
+    # Ticker sets (e.g. SpendLimit.allowed_tickers in audit request data)
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    raise TypeError
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson instead of the stdlib json module."""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
 app = FastAPI(
     title="AgentWallet API",
     description="Financial infrastructure for AI agents with spend controls, rules engine, and audit logging.",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
+# Largest request body accepted, by route. The default covers the fixed-shape
+# bodies (orders, single approvals, kill switch reasons).
+MAX_BODY_BYTES = 16 * 1024
+ROUTE_MAX_BODY_BYTES = {
+    "/agents": 1024 * 1024,  # free-form metadata and ticker allow/block lists
+    "/rules": 256 * 1024,  # condition_params, e.g. ticker_block lists
+    "/approvals/batch": 1024 * 1024,  # ~100 bytes per approval item
+}
+
+
+@app.middleware("http")
+async def reject_bad_bodies(request: Request, call_next):
+    """Turn away oversized or non-JSON bodies before they are read and validated."""
+    if request.method in ("POST", "PUT", "PATCH", "DELETE"):
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > 0:
+            if int(content_length) > ROUTE_MAX_BODY_BYTES.get(request.url.path, MAX_BODY_BYTES):
+                return ORJSONResponse({"detail": "Request body too large"}, status_code=413)
+            content_type = request.headers.get("content-type", "")
+            if not content_type.startswith("application/json"):
+                return ORJSONResponse({"detail": "Content-Type must be application/json"}, status_code=415)
+    return await call_next(request)
+
+
+# Registered after the body check so CORS headers are added to its rejections too
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Configure for production
@@ -142,19 +461,44 @@ def get_manager() -> AgentWalletManager:
     return manager
 
 
+def get_agent_wallet(
+    agent_id: str,
+    mgr: AgentWalletManager = Depends(get_manager),
+) -> AgentWallet:
+    """Resolve the path's agent_id to its wallet once per request (FastAPI caches dependencies)."""
+    try:
+        return mgr.get_wallet(agent_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+def now_iso() -> str:
+    """UTC timestamp accurate to ~100ms, maintained by the lifespan clock task."""
+    return getattr(app.state, "now_iso", None) or datetime.now(timezone.utc).isoformat()
+
+
+def get_approval_store() -> ApprovalStore:
+    if approval_store is None:
+        raise HTTPException(status_code=503, detail="Approval store not initialized")
+    return approval_store
+
+
 # ─────────────────────────────────────────────────────────────────
 # Health & Status
 # ─────────────────────────────────────────────────────────────────
 
 @app.get("/health")
 async def health():
-    return {"status": "ok", "timestamp": datetime.utcnow().isoformat()}
+    return {"status": "ok", "timestamp": now_iso()}
 
 
 @app.get("/status")
 async def status(mgr: AgentWalletManager = Depends(get_manager)):
     try:
-        balance = mgr.kalshi_client.get_balance()
+        balance = balance_cache.get(("status", "balance"))
+        if balance is None:
+            balance = await run_in_threadpool(mgr.kalshi_client.get_balance)
+            balance_cache[("status", "balance")] = balance
         return {
             "status": "connected",
             "kalshi_balance_cents": balance.get("balance", 0),
@@ -169,7 +513,7 @@ async def status(mgr: AgentWalletManager = Depends(get_manager)):
 # Agents
 # ─────────────────────────────────────────────────────────────────
 
-@app.post("/agents", response_model=AgentResponse)
+@app.post("/agents", response_model=None, responses={200: {"model": AgentResponse}})
 async def create_agent(
     req: AgentCreate,
     mgr: AgentWalletManager = Depends(get_manager),
@@ -193,33 +537,18 @@ async def create_agent(
         metadata=req.metadata,
     )
     
-    return AgentResponse(
-        agent_id=agent.agent_id,
-        name=agent.name,
-        description=agent.description,
-        created_at=agent.created_at,
-        is_active=agent.is_active,
-        metadata=agent.metadata,
-    )
+    return asdict(agent)
 
 
 @app.get("/agents", response_model=List[AgentResponse])
 async def list_agents(mgr: AgentWalletManager = Depends(get_manager)):
     """List all agents."""
-    return [
-        AgentResponse(
-            agent_id=a.agent_id,
-            name=a.name,
-            description=a.description,
-            created_at=a.created_at,
-            is_active=a.is_active,
-            metadata=a.metadata,
-        )
-        for a in mgr.agents.values()
-    ]
+    agents = agent_list_adapter.validate_python(list(mgr.agents.values()))
+    # Serialize straight to bytes; response_model stays for the schema docs
+    return Response(content=agent_list_adapter.dump_json(agents), media_type="application/json")
 
 
-@app.get("/agents/{agent_id}", response_model=AgentResponse)
+@app.get("/agents/{agent_id}", response_model=None, responses={200: {"model": AgentResponse}})
 async def get_agent(
     agent_id: str,
     mgr: AgentWalletManager = Depends(get_manager),
@@ -228,70 +557,63 @@ async def get_agent(
     if agent_id not in mgr.agents:
         raise HTTPException(status_code=404, detail="Agent not found")
     
-    a = mgr.agents[agent_id]
-    return AgentResponse(
-        agent_id=a.agent_id,
-        name=a.name,
-        description=a.description,
-        created_at=a.created_at,
-        is_active=a.is_active,
-        metadata=a.metadata,
-    )
+    return asdict(mgr.agents[agent_id])
 
 
-@app.post("/agents/{agent_id}/deactivate")
+@app.post("/agents/{agent_id}/deactivate", status_code=204, response_class=Response)
 async def deactivate_agent(
     agent_id: str,
     mgr: AgentWalletManager = Depends(get_manager),
 ):
     """Deactivate an agent."""
     mgr.deactivate_agent(agent_id)
-    return {"status": "deactivated", "agent_id": agent_id}
+    return Response(status_code=204)
 
 
-@app.post("/agents/{agent_id}/activate")
+@app.post("/agents/{agent_id}/activate", status_code=204, response_class=Response)
 async def activate_agent(
     agent_id: str,
     mgr: AgentWalletManager = Depends(get_manager),
 ):
     """Reactivate an agent."""
     mgr.activate_agent(agent_id)
-    return {"status": "activated", "agent_id": agent_id}
+    return Response(status_code=204)
 
 
 # ─────────────────────────────────────────────────────────────────
 # Wallet Operations
 # ─────────────────────────────────────────────────────────────────
+# The Kalshi client is blocking, so wallet calls run in the threadpool
+# to keep the event loop free for other requests.
 
 @app.get("/agents/{agent_id}/balance")
 async def get_balance(
     agent_id: str,
-    mgr: AgentWalletManager = Depends(get_manager),
+    wallet: AgentWallet = Depends(get_agent_wallet),
 ):
     """Get agent's Kalshi balance."""
+    key = (agent_id, "balance")
+    cached = get_cached_read(wallet, ActionType.GET_BALANCE, {}, balance_cache, key)
+    if cached is not None:
+        return cached
     try:
-        wallet = mgr.get_wallet(agent_id)
-        return wallet.get_balance()
+        balance = await run_in_threadpool(wallet.get_balance)
     except PermissionError as e:
         raise HTTPException(status_code=403, detail=str(e))
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
+    balance_cache[key] = balance
+    return balance
 
 
 @app.get("/agents/{agent_id}/positions")
 async def get_positions(
-    agent_id: str,
     limit: int = 100,
-    mgr: AgentWalletManager = Depends(get_manager),
+    wallet: AgentWallet = Depends(get_agent_wallet),
 ):
     """Get agent's positions."""
     try:
-        wallet = mgr.get_wallet(agent_id)
-        return wallet.get_positions(limit=limit)
+        return await run_in_threadpool(wallet.get_positions, limit=limit)
     except PermissionError as e:
         raise HTTPException(status_code=403, detail=str(e))
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
 
 
 @app.get("/agents/{agent_id}/markets")
@@ -299,33 +621,34 @@ async def get_markets(
     agent_id: str,
     status: Optional[str] = None,
     limit: int = 100,
-    mgr: AgentWalletManager = Depends(get_manager),
+    wallet: AgentWallet = Depends(get_agent_wallet),
 ):
     """Get available markets."""
+    key = (agent_id, status, limit, "markets")
+    cached = get_cached_read(
+        wallet, ActionType.GET_MARKETS, {"status": status, "limit": limit}, markets_cache, key,
+    )
+    if cached is not None:
+        return cached
     try:
-        wallet = mgr.get_wallet(agent_id)
-        return wallet.get_markets(status=status, limit=limit)
+        markets = await run_in_threadpool(wallet.get_markets, status=status, limit=limit)
     except PermissionError as e:
         raise HTTPException(status_code=403, detail=str(e))
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
+    markets_cache[key] = markets
+    return markets
 
 
 @app.get("/agents/{agent_id}/orderbook/{ticker}")
 async def get_orderbook(
-    agent_id: str,
     ticker: str,
     depth: int = 10,
-    mgr: AgentWalletManager = Depends(get_manager),
+    wallet: AgentWallet = Depends(get_agent_wallet),
 ):
     """Get orderbook for a market."""
     try:
-        wallet = mgr.get_wallet(agent_id)
-        return wallet.get_orderbook(ticker=ticker, depth=depth)
+        return await run_in_threadpool(wallet.get_orderbook, ticker=ticker, depth=depth)
     except PermissionError as e:
         raise HTTPException(status_code=403, detail=str(e))
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
 
 
 # ─────────────────────────────────────────────────────────────────
@@ -336,7 +659,8 @@ async def get_orderbook(
 async def create_order(
     agent_id: str,
     order: OrderCreate,
-    mgr: AgentWalletManager = Depends(get_manager),
+    wallet: AgentWallet = Depends(get_agent_wallet),
+    store: ApprovalStore = Depends(get_approval_store),
 ):
     """
     Create an order through spend controls.
@@ -345,8 +669,8 @@ async def create_order(
     Returns 202 if requires approval (check /approvals/pending).
     """
     try:
-        wallet = mgr.get_wallet(agent_id)
-        result = wallet.create_order(
+        result = await run_in_threadpool(
+            wallet.create_order,
             ticker=order.ticker,
             side=order.side,
             action=order.action,
@@ -356,6 +680,7 @@ async def create_order(
             no_price=order.no_price,
             client_order_id=order.client_order_id,
         )
+        invalidate_balances()
         return {"status": "executed", "order": result}
     
     except PermissionError as e:
@@ -363,16 +688,14 @@ async def create_order(
         
         # Check if requires approval
         if "Requires approval" in error_msg:
-            import uuid
-            request_id = str(uuid.uuid4())
-            pending_approvals[request_id] = {
-                "request_id": request_id,
-                "agent_id": agent_id,
-                "order": order.model_dump(),
-                "created_at": datetime.utcnow().isoformat(),
-                "status": "pending",
-                "reason": error_msg,
-            }
+            request_id = secrets.token_hex(16)
+            await store.create(PendingApproval(
+                request_id=request_id,
+                agent_id=agent_id,
+                order=order.model_dump(),
+                created_at=now_iso(),
+                reason=error_msg,
+            ))
             return {
                 "status": "pending_approval",
                 "request_id": request_id,
@@ -381,42 +704,36 @@ async def create_order(
         
         raise HTTPException(status_code=403, detail=error_msg)
     
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.delete("/agents/{agent_id}/orders/{order_id}")
+@app.delete("/agents/{agent_id}/orders/{order_id}", status_code=204, response_class=Response)
 async def cancel_order(
-    agent_id: str,
     order_id: str,
-    mgr: AgentWalletManager = Depends(get_manager),
+    wallet: AgentWallet = Depends(get_agent_wallet),
 ):
     """Cancel an order."""
     try:
-        wallet = mgr.get_wallet(agent_id)
-        return wallet.cancel_order(order_id)
+        await run_in_threadpool(wallet.cancel_order, order_id)
     except PermissionError as e:
         raise HTTPException(status_code=403, detail=str(e))
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
+    invalidate_balances()
+    return Response(status_code=204)
 
 
 @app.delete("/agents/{agent_id}/orders")
 async def cancel_all_orders(
-    agent_id: str,
     ticker: Optional[str] = None,
-    mgr: AgentWalletManager = Depends(get_manager),
+    wallet: AgentWallet = Depends(get_agent_wallet),
 ):
     """Cancel all resting orders."""
     try:
-        wallet = mgr.get_wallet(agent_id)
-        return wallet.cancel_all_orders(ticker=ticker)
+        result = await run_in_threadpool(wallet.cancel_all_orders, ticker=ticker)
     except PermissionError as e:
         raise HTTPException(status_code=403, detail=str(e))
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
+    invalidate_balances()
+    return result
 
 
 # ─────────────────────────────────────────────────────────────────
@@ -424,73 +741,152 @@ async def cancel_all_orders(
 # ─────────────────────────────────────────────────────────────────
 
 @app.get("/approvals/pending")
-async def list_pending_approvals():
+async def list_pending_approvals(store: ApprovalStore = Depends(get_approval_store)):
     """List all pending approval requests."""
-    return {
-        "pending": [
-            v for v in pending_approvals.values()
-            if v["status"] == "pending"
-        ]
-    }
+    return {"pending": await store.list_pending()}
 
 
 @app.get("/approvals/{request_id}")
-async def get_approval(request_id: str):
+async def get_approval(
+    request_id: str,
+    store: ApprovalStore = Depends(get_approval_store),
+):
     """Get approval request details."""
-    if request_id not in pending_approvals:
+    req = await store.get(request_id)
+    if req is None:
         raise HTTPException(status_code=404, detail="Approval request not found")
-    return pending_approvals[request_id]
+    return req
 
 
-@app.post("/approvals/{request_id}")
-async def process_approval(
+async def apply_approval(
     request_id: str,
     approval: ApprovalRequest,
-    mgr: AgentWalletManager = Depends(get_manager),
-):
-    """Approve or deny a pending request."""
-    if request_id not in pending_approvals:
+    mgr: AgentWalletManager,
+    store: ApprovalStore,
+) -> Dict[str, Any]:
+    """Approve or deny one pending request; raises HTTPException on failure."""
+    req = await store.get(request_id)
+    if req is None:
         raise HTTPException(status_code=404, detail="Approval request not found")
     
-    req = pending_approvals[request_id]
+    # With a shared store the request may belong to an agent another worker
+    # owns; leave it unclaimed for that worker rather than failing it here
+    if approval.approved and req.agent_id not in mgr.wallets:
+        raise HTTPException(status_code=404, detail=f"Agent {req.agent_id} not found on this worker")
     
-    if req["status"] != "pending":
+    # Claim the request before awaiting anything else, so a concurrent
+    # approve/deny of the same id can't also get past this point
+    if not await store.claim(request_id):
         raise HTTPException(status_code=400, detail="Request already processed")
     
-    if approval.approved:
-        # Execute the order directly (bypass rules since manually approved)
-        try:
-            wallet = mgr.get_wallet(req["agent_id"])
-            order_data = req["order"]
-            
-            # Call underlying client directly to bypass rules
-            result = wallet.client.create_order(
-                ticker=order_data["ticker"],
-                side=order_data["side"],
-                action=order_data["action"],
-                count=order_data["count"],
-                type=order_data["type"],
-                yes_price=order_data.get("yes_price"),
-                no_price=order_data.get("no_price"),
-                client_order_id=order_data.get("client_order_id"),
-            )
-            
-            req["status"] = "approved"
-            req["approved_by"] = approval.approver
-            req["approved_at"] = datetime.utcnow().isoformat()
-            req["result"] = result
+    resolved = False
+    try:
+        if approval.approved:
+            # Execute the order directly (bypass rules since manually approved)
+            try:
+                wallet = mgr.get_wallet(req.agent_id)
+                order_data = req.order
+                
+                # Call underlying client directly to bypass rules
+                result = await run_in_threadpool(
+                    wallet.client.create_order,
+                    ticker=order_data["ticker"],
+                    side=order_data["side"],
+                    action=order_data["action"],
+                    count=order_data["count"],
+                    type=order_data["type"],
+                    yes_price=order_data.get("yes_price"),
+                    no_price=order_data.get("no_price"),
+                    client_order_id=order_data.get("client_order_id"),
+                )
+                
+                await store.update(request_id, {
+                    "status": "approved",
+                    "approved_by": approval.approver,
+                    "approved_at": now_iso(),
+                    "result": result,
+                })
+                resolved = True
+                invalidate_balances()
+                
+                return {"status": "approved", "order": result}
             
-            return {"status": "approved", "order": result}
-        
-        except Exception as e:
-            req["status"] = "failed"
-            req["error"] = str(e)
-            raise HTTPException(status_code=500, detail=str(e))
-    else:
-        req["status"] = "denied"
-        req["denied_by"] = approval.approver
-        req["denied_at"] = datetime.utcnow().isoformat()
-        return {"status": "denied"}
+            except Exception as e:
+                await store.update(request_id, {"status": "failed", "error": str(e)})
+                resolved = True
+                raise HTTPException(status_code=500, detail=str(e))
+        else:
+            await store.update(request_id, {
+                "status": "denied",
+                "denied_by": approval.approver,
+                "denied_at": now_iso(),
+            })
+            resolved = True
+            return {"status": "denied"}
+    finally:
+        if not resolved:
+            # Cancelled (client disconnect, shutdown) after the claim. Don't
+            # leave the request stuck in "processing": a deny can simply be
+            # retried, but an approved order may already be on the exchange
+            # (the threadpool call isn't interrupted), so it's never re-offered.
+            if approval.approved:
+                await store.update(request_id, {
+                    "status": "failed",
+                    "error": "Interrupted before the outcome was recorded; check the exchange for the order",
+                })
+            else:
+                await store.update(request_id, {"status": "pending"})
+
+
+@app.post("/approvals/batch")
+async def process_approvals_batch(
+    approvals: List[ApprovalRequest],
+    mgr: AgentWalletManager = Depends(get_manager),
+    store: ApprovalStore = Depends(get_approval_store),
+):
+    """
+    Approve or deny several pending requests in one call.
+    Approved orders are placed concurrently; each item reports its own outcome.
+    Each request is claimed in the store before it is acted on, so an id
+    repeated in the batch (or decided elsewhere meanwhile) reports an error.
+    If the call is cancelled partway, each claimed request is released by
+    apply_approval rather than left "processing".
+    """
+    outcomes = await asyncio.gather(
+        *(apply_approval(a.request_id, a, mgr, store) for a in approvals),
+        return_exceptions=True,
+    )
+    
+    results = []
+    for approval, outcome in zip(approvals, outcomes):
+        if isinstance(outcome, HTTPException):
+            results.append({
+                "request_id": approval.request_id,
+                "status": "error",
+                "status_code": outcome.status_code,
+                "detail": outcome.detail,
+            })
+        elif isinstance(outcome, Exception):
+            results.append({
+                "request_id": approval.request_id,
+                "status": "error",
+                "status_code": 500,
+                "detail": str(outcome),
+            })
+        else:
+            results.append({"request_id": approval.request_id, **outcome})
+    return {"results": results}
+
+
+@app.post("/approvals/{request_id}")
+async def process_approval(
+    request_id: str,
+    approval: ApprovalRequest,
+    mgr: AgentWalletManager = Depends(get_manager),
+    store: ApprovalStore = Depends(get_approval_store),
+):
+    """Approve or deny a pending request."""
+    return await apply_approval(request_id, approval, mgr, store)
 
 
 # ─────────────────────────────────────────────────────────────────
@@ -501,29 +897,21 @@ async def process_approval(
 async def agent_kill_switch(
     agent_id: str,
     req: KillSwitchRequest,
-    mgr: AgentWalletManager = Depends(get_manager),
+    wallet: AgentWallet = Depends(get_agent_wallet),
 ):
     """Activate kill switch for a single agent."""
-    try:
-        wallet = mgr.get_wallet(agent_id)
-        result = wallet.activate_kill_switch(req.reason)
-        return {"status": "kill_switch_activated", "agent_id": agent_id, "result": result}
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
+    result = await run_in_threadpool(wallet.activate_kill_switch, req.reason)
+    invalidate_balances()
+    return {"status": "kill_switch_activated", "agent_id": agent_id, "result": result}
 
 
-@app.delete("/agents/{agent_id}/kill-switch")
+@app.delete("/agents/{agent_id}/kill-switch", status_code=204, response_class=Response)
 async def agent_kill_switch_off(
-    agent_id: str,
-    mgr: AgentWalletManager = Depends(get_manager),
+    wallet: AgentWallet = Depends(get_agent_wallet),
 ):
     """Deactivate kill switch for a single agent."""
-    try:
-        wallet = mgr.get_wallet(agent_id)
-        wallet.deactivate_kill_switch()
-        return {"status": "kill_switch_deactivated", "agent_id": agent_id}
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
+    wallet.deactivate_kill_switch()
+    return Response(status_code=204)
 
 
 @app.post("/kill-switch")
@@ -532,7 +920,8 @@ async def global_kill_switch(
     mgr: AgentWalletManager = Depends(get_manager),
 ):
     """Activate kill switch for ALL agents."""
-    result = mgr.global_kill_switch(req.reason)
+    result = await run_in_threadpool(mgr.global_kill_switch, req.reason)
+    invalidate_balances()
     return {"status": "global_kill_switch_activated", "results": result}
 
 
@@ -540,36 +929,82 @@ async def global_kill_switch(
 # Rules
 # ─────────────────────────────────────────────────────────────────
 
-def build_condition(condition_type: str, params: Dict[str, Any]):
+def _number(params: Dict[str, Any], key: str, default: float) -> float:
+    value = params.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"condition_params.{key} must be a number")
+    return value
+
+
+# Numeric condition types are built as expressions (see compile_condition) so
+# the rules engine can fuse them into one predicate
+def _src_max_order_value(params: Dict[str, Any]) -> str:
+    return f"order_value > {_number(params, 'threshold', 10000)!r}"
+
+
+def _src_time_block(params: Dict[str, Any]) -> str:
+    # Block during certain hours (UTC)
+    start_hour = _number(params, "start_hour", 0)
+    end_hour = _number(params, "end_hour", 6)
+    return f"{start_hour!r} <= hour < {end_hour!r}"
+
+
+def _src_weekend_block(params: Dict[str, Any]) -> str:
+    return "weekday >= 5"
+
+
+def _src_position_size(params: Dict[str, Any]) -> str:
+    return f"count > {_number(params, 'max_size', 100)!r}"
+
+
+def _src_daily_spend(params: Dict[str, Any]) -> str:
+    return f"daily_spend > {_number(params, 'threshold', 50000)!r}"
+
+
+def _build_ticker_block(params: Dict[str, Any]) -> Condition:
+    blocked = frozenset(params.get("tickers", []))
+    return lambda ctx, b=blocked: ctx.ticker in b
+
+
+# condition_type -> source(params) -> numeric expression
+CONDITION_SOURCES: Dict[str, Callable[[Dict[str, Any]], str]] = {
+    "max_order_value": _src_max_order_value,
+    "time_block": _src_time_block,
+    "weekend_block": _src_weekend_block,
+    "position_size": _src_position_size,
+    "daily_spend": _src_daily_spend,
+}
+
+# condition_type -> builder(params) -> condition, for conditions that aren't
+# numeric expressions. Params are bound as default args so each condition only
+# does local lookups against the EvalContext.
+# Register new condition types here or in CONDITION_SOURCES.
+CONDITION_BUILDERS: Dict[str, Callable[[Dict[str, Any]], Condition]] = {
+    "ticker_block": _build_ticker_block,
+}
+
+ACTION_MAP = {
+    "allow": RuleResult.ALLOW,
+    "deny": RuleResult.DENY,
+    "require_approval": RuleResult.REQUIRE_APPROVAL,
+}
+
+
+def build_condition_src(condition_type: str, params: Dict[str, Any]) -> Optional[str]:
+    """Numeric expression for a condition type, or None if it has no expression form."""
+    source = CONDITION_SOURCES.get(condition_type)
+    return source(params) if source is not None else None
+
+
+def build_condition(condition_type: str, params: Dict[str, Any]) -> Condition:
     """Build a rule condition function from type and params."""
-    
-    if condition_type == "max_order_value":
-        threshold = params.get("threshold", 10000)
-        return lambda ctx: ctx.get("order_value", 0) > threshold
-    
-    elif condition_type == "ticker_block":
-        blocked = params.get("tickers", [])
-        return lambda ctx: ctx.get("ticker", "") in blocked
-    
-    elif condition_type == "time_block":
-        # Block during certain hours (UTC)
-        start_hour = params.get("start_hour", 0)
-        end_hour = params.get("end_hour", 6)
-        return lambda ctx: start_hour <= datetime.utcnow().hour < end_hour
-    
-    elif condition_type == "weekend_block":
-        return lambda ctx: datetime.utcnow().weekday() >= 5
-    
-    elif condition_type == "position_size":
-        max_size = params.get("max_size", 100)
-        return lambda ctx: ctx.get("count", 0) > max_size
-    
-    elif condition_type == "daily_spend":
-        threshold = params.get("threshold", 50000)
-        return lambda ctx: ctx.get("daily_spend", 0) > threshold
-    
-    else:
+    condition_src = build_condition_src(condition_type, params)
+    if condition_src is not None:
+        return compile_condition(condition_src)
+    builder = CONDITION_BUILDERS.get(condition_type)
+    if builder is None:
         raise ValueError(f"Unknown condition type: {condition_type}")
+    return builder(params)
 
 
 @app.post("/rules")
@@ -580,20 +1015,21 @@ async def create_rule(
     """Add a new rule to the engine."""
     try:
         condition = build_condition(rule.condition_type, rule.condition_params)
-        
-        action_map = {
-            "allow": RuleResult.ALLOW,
-            "deny": RuleResult.DENY,
-            "require_approval": RuleResult.REQUIRE_APPROVAL,
-        }
+        condition_src = build_condition_src(rule.condition_type, rule.condition_params)
         
         new_rule = Rule(
             rule_id=rule.rule_id,
             name=rule.name,
             description=rule.description,
             condition=condition,
-            action=action_map[rule.action],
+            action=ACTION_MAP[rule.action],
             priority=rule.priority,
+            condition_type=rule.condition_type,
+            condition_src=condition_src,
+            applies_to=(
+                frozenset(ActionType[name.upper()] for name in rule.applies_to)
+                if rule.applies_to is not None else None
+            ),
         )
         
         mgr.add_rule(new_rule)
@@ -619,6 +1055,10 @@ async def list_rules(mgr: AgentWalletManager = Depends(get_manager)):
                 "action": r.action.value,
                 "priority": r.priority,
                 "is_active": r.is_active,
+                "applies_to": (
+                    sorted(ACTION_TYPE_NAMES[a] for a in r.applies_to)
+                    if r.applies_to is not None else None
+                ),
             }
             for r in mgr.rules_engine.rules.values()
         ]
@@ -643,10 +1083,14 @@ async def delete_rule(
 async def get_audit_log(
     agent_id: Optional[str] = None,
     limit: int = 100,
+    persisted: bool = False,
     mgr: AgentWalletManager = Depends(get_manager),
 ):
-    """Get audit log entries."""
-    events = mgr.get_audit_log(agent_id=agent_id, limit=limit)
+    """
+    Get audit log entries.
+    persisted=true reads the log file (including earlier runs) instead of memory.
+    """
+    events = await run_in_threadpool(mgr.get_audit_log, agent_id=agent_id, limit=limit, persisted=persisted)
     return {"events": events}
 
 
@@ -656,4 +1100,13 @@ async def get_audit_log(
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8100)
+    # Agents, rules and kill switches live in-process, so extra workers only
+    # make sense once that state is shared. REDIS_URL shares approvals, but an
+    # approved order can still only be placed by the worker owning its agent.
+    # uvloop/httptools are picked up automatically from uvicorn[standard].
+    uvicorn.run(
+        "agent_wallet_api:app",
+        host="0.0.0.0",
+        port=8100,
+        workers=int(os.environ.get("WEB_CONCURRENCY", "1")),
+    )
@@ -6,6 +6,7 @@ This will place a small order on Kalshi to verify the full stack works.
 
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 # Add services to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -58,17 +59,18 @@ def main():
         return
     
     # Find a cheap market (low yes price = cheap to buy)
-    best_market = None
-    best_price = 100
+    # Skip if no ask price or too expensive
+    candidates = [m for m in markets if m.get("yes_ask", 99) and m.get("yes_ask", 99) <= 20]  # Max 20 cents
     
-    for market in markets:
-        ticker = market.get("ticker", "")
-        yes_price = market.get("yes_ask", 99)
-        
-        # Skip if no ask price or too expensive
-        if yes_price and yes_price < best_price and yes_price <= 20:  # Max 20 cents
-            best_market = market
-            best_price = yes_price
+    # Fetch candidate orderbooks concurrently over the client's shared connection
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        orderbooks = dict(executor.map(
+            lambda m: (m["ticker"], wallet.get_orderbook(m["ticker"], depth=3)),
+            candidates,
+        ))
+    
+    # Cheapest candidate in one C-level pass
+    best_market = min(candidates, key=lambda m: m["yes_ask"], default=None)
     
     if not best_market:
         print("❌ No suitable cheap markets found (need yes_ask <= 20 cents)")
@@ -86,9 +88,9 @@ def main():
     print(f"   Title: {title}")
     print(f"   Yes Ask: {yes_ask}¢")
     
-    # Get orderbook
+    # Orderbook (prefetched above)
     print("\n📖 Orderbook:")
-    orderbook = wallet.get_orderbook(ticker, depth=3)
+    orderbook = orderbooks[ticker]
     print(f"   Yes bids: {orderbook.get('yes', {}).get('bids', [])[:3]}")
     print(f"   Yes asks: {orderbook.get('yes', {}).get('asks', [])[:3]}")
     